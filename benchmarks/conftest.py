@@ -0,0 +1,130 @@
+"""
+Benchmark fixtures
+──────────────────
+Every benchmark runs on synthetic DrugBank XML (see synth_drugbank.py) and is
+checked against `baselines.json`: a run fails when throughput drops below
+baseline / BENCH_SLOWDOWN or peak memory grows above baseline × BENCH_MEM_GROWTH
++ 1 MB.  Memory is tracemalloc's peak (Python heap only), or – for paths whose
+memory lives in C extensions such as lxml – the peak RSS of a fresh interpreter.
+
+    pytest benchmarks/                             # 2 000 drugs
+    BENCH_DRUGS=50000 pytest benchmarks/           # larger corpus
+    BENCH_UPDATE_BASELINES=1 pytest benchmarks/    # re-record baselines.json
+"""
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+import warnings
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for sub in ("preprocessing", "interface", "rag", "benchmarks", ""):
+    sys.path.insert(0, str(ROOT / sub))
+
+BENCH_DRUGS = int(os.getenv("BENCH_DRUGS", "2000"))
+SLOWDOWN = float(os.getenv("BENCH_SLOWDOWN", "2.0"))
+MEM_GROWTH = float(os.getenv("BENCH_MEM_GROWTH", "1.5"))
+MEM_SLACK_MB = 1.0   # keeps sub-MB baselines from flaking
+UPDATE = os.getenv("BENCH_UPDATE_BASELINES", "") not in ("", "0")
+BASELINES = Path(__file__).with_name("baselines.json")
+
+
+# ------------------------------------------------------------------ corpus
+@pytest.fixture(scope="session")
+def n_drugs() -> int:
+    return BENCH_DRUGS
+
+
+@pytest.fixture(scope="session")
+def synth_xml(tmp_path_factory, n_drugs) -> Path:
+    from synth_drugbank import generate
+    return generate(tmp_path_factory.mktemp("synth") / "full_database.xml", n_drugs)
+
+
+@pytest.fixture(scope="session")
+def parsed_drugs(synth_xml) -> List[Dict]:
+    from xml_parser import iter_drugs
+    return list(iter_drugs(str(synth_xml)))
+
+
+@pytest.fixture(scope="session")
+def triples_csv(tmp_path_factory, parsed_drugs) -> Path:
+    from triples_generator import drug_triples, write_triples
+    triples = set()
+    for d in parsed_drugs:
+        drug_triples(d, triples)
+    out = tmp_path_factory.mktemp("processed") / "kg_triples.csv"
+    write_triples(triples, out)
+    return out
+
+
+# ------------------------------------------------------------------ baselines
+def _peak_mb(fn: Callable) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+
+def _peak_rss_mb(script: str) -> Optional[float]:
+    """Run *script* in a fresh interpreter and return that process's own peak RSS."""
+    prelude = "".join(f"sys.path.insert(0, {str(ROOT / sub)!r})\n"
+                      for sub in ("preprocessing", "interface", "rag", "benchmarks", ""))
+    epilogue = "\nfrom common.metrics import peak_rss_mb\nprint(peak_rss_mb())\n"
+    out = subprocess.run([sys.executable, "-c", "import sys\n" + prelude + script + epilogue],
+                         check=True, capture_output=True, text=True).stdout
+    last = out.strip().splitlines()[-1]
+    return None if last == "None" else float(last)
+
+
+@pytest.fixture(scope="session")
+def _baselines():
+    data = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    yield data
+    if UPDATE:
+        BASELINES.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture
+def check_baseline(benchmark, _baselines, n_drugs):
+    """`check_baseline(name, records, fn, rss_script=None)` – call after `benchmark(...)` ran *fn*.
+
+    With *rss_script* (Python source that repeats *fn*'s work) memory is the
+    peak RSS of a subprocess running it instead of tracemalloc's peak."""
+
+    def check(name: str, records: int, fn: Callable, rss_script: Optional[str] = None) -> None:
+        rate = records / benchmark.stats.stats.mean
+        mem_key = "peak_rss_mb" if rss_script else "peak_mb"
+        peak = _peak_rss_mb(rss_script) if rss_script else _peak_mb(fn)
+        benchmark.extra_info.update(records=records, records_per_s=round(rate, 1))
+        if peak is not None:
+            benchmark.extra_info[mem_key] = round(peak, 2)
+        key = f"{name}@{n_drugs}"
+
+        if UPDATE:
+            _baselines[key] = {"records_per_s": round(rate, 1)}
+            if peak is not None:
+                _baselines[key][mem_key] = round(peak, 2)
+            return
+        base = _baselines.get(key)
+        if base is None:
+            warnings.warn(f"no baseline for {key} – run with BENCH_UPDATE_BASELINES=1")
+            return
+
+        assert rate >= base["records_per_s"] / SLOWDOWN, (
+            f"{key}: {rate:,.0f} records/s is more than {SLOWDOWN}× slower "
+            f"than the baseline {base['records_per_s']:,.0f} records/s")
+        if peak is None or mem_key not in base:
+            warnings.warn(f"{key}: no {mem_key} to compare – memory not checked")
+            return
+        assert peak <= base[mem_key] * MEM_GROWTH + MEM_SLACK_MB, (
+            f"{key}: peak {peak:,.1f} MB exceeds baseline {base[mem_key]:,.1f} MB × {MEM_GROWTH}")
+
+    return check
@@ -0,0 +1,294 @@
+"""
+Synthetic DrugBank XML generator
+────────────────────────────────
+• Writes a `full_database.xml` look-alike following the DrugBank 5.x schema, so
+  the pipeline can be benchmarked without the licensed dump.
+• Deterministic for a given --seed; streams to disk, so 500k drugs need only a
+  few MB of memory.
+• Per-drug counts are drawn from heavy-tailed distributions (most drugs have a
+  handful of products/interactions, a few have hundreds), with the nesting of
+  the real file: products, prices, patents, drug-interactions pointing at other
+  generated IDs, targets/enzymes/carriers/transporters with polypeptides, …
+  Pathway <drugs> lists are left out.
+
+    python benchmarks/synth_drugbank.py --drugs 10000 --out data/raw/synth_10k.xml
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import List, TextIO
+from xml.sax.saxutils import escape
+
+_SYLLABLES = ["lepi", "ru", "cetu", "xi", "mab", "zora", "bi", "dene", "tal", "vo", "pra",
+              "sta", "lo", "quin", "fen", "oxa", "cil", "mero", "dro", "tri", "amo", "ven",
+              "clo", "pi", "na", "gli", "mi", "de", "sar", "tan", "pril", "olol", "azo",
+              "kin", "tre", "val", "ro", "nu", "fex", "lu"]
+_SUFFIXES = ["rudin", "ximab", "tinib", "statin", "pril", "sartan", "olol", "azole",
+             "cillin", "mycin", "floxacin", "dipine", "parin", "vir", "zumab", "gliptin",
+             "lukast", "tidine", "prazole", "setron"]
+_WORDS = ("the of and to in is a with for by as an on that are this be it from at "
+          "inhibitor receptor plasma binding protein dose hepatic renal clearance "
+          "half-life absorption metabolism oral intravenous patients treatment "
+          "thrombin platelet kinase enzyme substrate activity concentration effect "
+          "therapy clinical serum levels reduced increased mechanism agonist antagonist").split()
+_ENTITIES = ["Thrombin", "Warfarin", "CYP3A4", "CYP2D6", "Heparin", "Aspirin", "Insulin",
+             "P-glycoprotein", "Prothrombin", "Factor Xa", "Hirudin", "Albumin"]
+_GROUPS = ["approved", "investigational", "experimental", "withdrawn", "vet_approved",
+           "nutraceutical", "illicit"]
+_COUNTRIES = ["US", "Canada", "EU"]
+_ROUTES = ["Oral", "Intravenous", "Subcutaneous", "Topical", "Intramuscular", "Inhalation"]
+_FORMS = ["Tablet", "Capsule", "Injection, solution", "Cream", "Powder", "Kit", "Solution"]
+_LABELLERS = [f"Labeller {c}{i}" for c in "ABCDEFGH" for i in range(25)]
+_CATEGORIES = ["Anticoagulants", "Antithrombins", "Enzyme Inhibitors", "Peptides",
+               "Analgesics", "Antihypertensive Agents", "Antineoplastic Agents",
+               "Cytochrome P-450 CYP3A Inhibitors", "Antibacterial Agents", "Hormones"]
+_KINGDOMS = ["Organic compounds", "Inorganic compounds"]
+_RESOURCES = ["UniProtKB", "PubChem Compound", "PubChem Substance", "KEGG Drug", "ChEBI",
+              "ChEMBL", "PharmGKB", "Therapeutic Targets Database", "Wikipedia", "RxCUI"]
+_PROPS = ["logP", "logS", "Water Solubility", "IUPAC Name", "SMILES", "Molecular Weight",
+          "pKa (strongest acidic)", "Polar Surface Area (PSA)", "H Bond Donor Count"]
+
+
+def _count(rng: random.Random, mean: float, cap: int) -> int:
+    """Heavy-tailed non-negative count with the given mean."""
+    return min(cap, int(rng.expovariate(1 / mean))) if mean > 0 else 0
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    words = [rng.choice(_ENTITIES) if rng.random() < 0.08 else rng.choice(_WORDS)
+             for _ in range(n_words)]
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + "."
+
+
+def _text(rng: random.Random, mean_words: int, p_missing: float = 0.2) -> str:
+    if rng.random() < p_missing:
+        return ""
+    n = max(5, int(rng.gauss(mean_words, mean_words / 3)))
+    out, left = [], n
+    while left > 0:
+        k = min(left, rng.randint(8, 25))
+        out.append(_sentence(rng, k))
+        left -= k
+    return " ".join(out)
+
+
+def _names(rng: random.Random, n: int) -> List[str]:
+    seen, names = set(), []
+    while len(names) < n:
+        name = "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 3)))
+        name = (name + rng.choice(_SUFFIXES)).capitalize()
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _el(tag: str, value) -> str:
+    return f"<{tag}>{escape(str(value))}</{tag}>" if value not in (None, "") else f"<{tag}/>"
+
+
+def _date(rng: random.Random, y0: int = 1985, y1: int = 2040) -> str:
+    return f"{rng.randint(y0, y1)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def _polypeptide_actor(rng: random.Random, tag: str, i: int) -> str:
+    uniprot = f"P{rng.randint(10000, 99999)}"
+    gene = "".join(rng.choice("ABCDEFGHKLMNPRST") for _ in range(3)) + str(rng.randint(1, 9))
+    pname = f"{rng.choice(_ENTITIES)} {rng.choice(['subunit alpha', 'receptor', 'synthase', 'transporter'])}"
+    return (
+        f'<{tag} position="{i + 1}">'
+        f'{_el("id", f"BE{rng.randint(1, 9999999):07d}")}{_el("name", pname)}'
+        f'{_el("organism", "Humans")}'
+        f'<actions>{_el("action", rng.choice(["inhibitor", "substrate", "agonist", "binder"]))}</actions>'
+        f'{_el("known-action", rng.choice(["yes", "no", "unknown"]))}'
+        f'<polypeptide id="{uniprot}" source="Swiss-Prot">{_el("name", pname)}'
+        f'{_el("general-function", _text(rng, 10, 0))}{_el("specific-function", _text(rng, 25, 0))}'
+        f'{_el("gene-name", gene)}{_el("locus", f"{rng.randint(1, 22)}q{rng.randint(11, 35)}")}'
+        f'{_el("cellular-location", "Secreted")}'
+        f'<organism ncbi-taxonomy-id="9606">Humans</organism>'
+        f'<synonyms>{_el("synonym", gene.lower())}</synonyms>'
+        f'<external-identifiers><external-identifier>{_el("resource", "UniProtKB")}'
+        f'{_el("identifier", uniprot)}</external-identifier></external-identifiers>'
+        f'</polypeptide></{tag}>'
+    )
+
+
+def _drug(rng: random.Random, i: int, ids: List[str], names: List[str], cfg: argparse.Namespace) -> str:
+    did, name = ids[i], names[i]
+    p = [f'<drug type="{rng.choice(["small molecule", "biotech"])}" '
+         f'created="{_date(rng, 2005, 2010)}" updated="{_date(rng, 2018, 2024)}">']
+    p.append(f'<drugbank-id primary="true">{did}</drugbank-id>')
+    for k in range(rng.choice([0, 1, 1, 2])):
+        p.append(_el("drugbank-id", f"{['APRD', 'BIOD', 'EXPT'][k]}{i:05d}"))
+    p.append(_el("name", name))
+    p.append(_el("description", _text(rng, 90, 0.05)))
+    p.append(_el("cas-number", f"{rng.randint(50, 999999)}-{rng.randint(10, 99)}-{rng.randint(0, 9)}"))
+    p.append(_el("unii", "".join(rng.choice("0123456789ABCDEFGHJKLMNPQRSTUVWXYZ") for _ in range(10))))
+    p.append(_el("state", rng.choice(["solid", "liquid", "gas"])))
+    if rng.random() < 0.85:
+        mass = rng.uniform(50, 2000)
+        p.append(_el("average-mass", f"{mass:.3f}"))
+        p.append(_el("monoisotopic-mass", f"{mass - rng.uniform(0, 1):.6f}"))
+    p.append("<groups>" + "".join(_el("group", g) for g in rng.sample(_GROUPS, rng.randint(1, 3))) + "</groups>")
+    p.append("<general-references><articles/><textbooks/><links/></general-references>")
+    for tag, words in (("indication", 40), ("pharmacodynamics", 60), ("mechanism-of-action", 60),
+                       ("toxicity", 50), ("metabolism", 30), ("absorption", 30), ("half-life", 8),
+                       ("protein-binding", 6), ("route-of-elimination", 25),
+                       ("volume-of-distribution", 10), ("clearance", 10)):
+        p.append(_el(tag, _text(rng, words)))
+    if rng.random() < 0.8:
+        p.append(
+            "<classification>"
+            f'{_el("description", _text(rng, 20, 0))}{_el("direct-parent", rng.choice(_CATEGORIES))}'
+            f'{_el("kingdom", rng.choice(_KINGDOMS))}{_el("superclass", "Organic acids and derivatives")}'
+            f'{_el("class", "Carboxylic acids and derivatives")}{_el("subclass", "Amino acids, peptides, and analogues")}'
+            "</classification>"
+        )
+    p.append("<synonyms>" + "".join(
+        f'<synonym language="english" coder="">{escape(name)} {k}</synonym>'
+        for k in range(_count(rng, 4, 60))) + "</synonyms>")
+
+    p.append("<products>")
+    for k in range(_count(rng, cfg.products, 400)):
+        p.append(
+            "<product>"
+            f'{_el("name", name if k % 3 else rng.choice(names).upper())}{_el("labeller", rng.choice(_LABELLERS))}'
+            f'{_el("ndc-id", "")}{_el("ndc-product-code", f"{rng.randint(1000, 99999)}-{rng.randint(100, 999)}")}'
+            f'{_el("dpd-id", "")}{_el("ema-product-code", "")}{_el("ema-ma-number", "")}'
+            f'{_el("started-marketing-on", _date(rng, 1985, 2023))}'
+            f'{_el("ended-marketing-on", _date(rng, 2000, 2030) if rng.random() < 0.3 else "")}'
+            f'{_el("dosage-form", rng.choice(_FORMS))}{_el("strength", f"{rng.choice([5, 10, 20, 50, 100])} mg")}'
+            f'{_el("route", rng.choice(_ROUTES))}{_el("fda-application-number", f"NDA{rng.randint(10000, 99999)}")}'
+            f'{_el("generic", rng.choice(["true", "false"]))}{_el("over-the-counter", "false")}'
+            f'{_el("approved", rng.choice(["true", "false"]))}{_el("country", rng.choice(_COUNTRIES))}'
+            f'{_el("source", "FDA NDC")}'
+            "</product>"
+        )
+    p.append("</products>")
+
+    p.append("<prices>" + "".join(
+        "<price>"
+        f'{_el("description", f"{name} {rng.choice([5, 10, 50])} mg {rng.choice(_FORMS).lower()}")}'
+        f'<cost currency="USD">{rng.uniform(0.1, 900):.2f}</cost>{_el("unit", rng.choice(["tablet", "vial", "ml", "each"]))}'
+        "</price>" for _ in range(_count(rng, 2, 80))) + "</prices>")
+
+    p.append("<categories>" + "".join(
+        f'<category>{_el("category", c)}{_el("mesh-id", f"D{rng.randint(1, 99999):06d}")}</category>'
+        for c in rng.sample(_CATEGORIES, rng.randint(0, 4))) + "</categories>")
+    p.append("<dosages>" + "".join(
+        f'<dosage>{_el("form", rng.choice(_FORMS))}{_el("route", rng.choice(_ROUTES))}'
+        f'{_el("strength", f"{rng.choice([5, 10, 20])} mg")}</dosage>'
+        for _ in range(_count(rng, 3, 40))) + "</dosages>")
+    p.append("<atc-codes>" + "".join(
+        f'<atc-code code="{c}">'
+        f'<level code="{c[:5]}">{escape(rng.choice(_CATEGORIES))}</level>'
+        f'<level code="{c[:4]}">{escape(rng.choice(_CATEGORIES))}</level>'
+        f'<level code="{c[:3]}">{escape(rng.choice(_CATEGORIES))}</level>'
+        f'<level code="{c[:1]}">{escape(rng.choice(_CATEGORIES))}</level></atc-code>'
+        for c in (f"{rng.choice('ABCDGHJLMNPRSV')}{rng.randint(1, 16):02d}"
+                  f"{rng.choice('ABCDEFX')}{rng.choice('ABCDEFX')}{rng.randint(1, 99):02d}"
+                  for _ in range(rng.choice([0, 1, 1, 2])))) + "</atc-codes>")
+
+    p.append("<patents>" + "".join(
+        "<patent>"
+        f'{_el("number", rng.randint(4000000, 11999999))}{_el("country", rng.choice(["United States", "Canada"]))}'
+        f'{_el("approved", _date(rng, 1990, 2022))}{_el("expires", _date(rng, 2000, 2042))}'
+        f'{_el("pediatric-extension", "false")}'
+        "</patent>" for _ in range(_count(rng, 1, 40))) + "</patents>")
+    p.append("<food-interactions>" + "".join(
+        _el("food-interaction", _sentence(rng, 8)) for _ in range(_count(rng, 1, 10))) + "</food-interactions>")
+
+    p.append("<drug-interactions>")
+    for j in rng.sample(range(len(ids)), min(len(ids) - 1, _count(rng, cfg.interactions, 2000))):
+        if j == i:
+            continue
+        effect = rng.choice(["anticoagulant activities", "hypotensive activities",
+                             "serum concentration", "excretion rate"])
+        descr = f"{names[j]} may {rng.choice(['increase', 'decrease'])} the {effect} of {name}."
+        p.append(
+            "<drug-interaction>"
+            f'{_el("drugbank-id", ids[j])}{_el("name", names[j])}{_el("description", descr)}'
+            "</drug-interaction>"
+        )
+    p.append("</drug-interactions>")
+
+    p.append("<experimental-properties>" + "".join(
+        f'<property>{_el("kind", k)}{_el("value", round(rng.uniform(-3, 300), 2))}{_el("source", "")}</property>'
+        for k in rng.sample(["melting point", "logP", "water solubility", "pKa"], rng.randint(0, 3)))
+        + "</experimental-properties>")
+    p.append("<external-identifiers>" + "".join(
+        f'<external-identifier>{_el("resource", r)}{_el("identifier", rng.randint(1, 9999999))}</external-identifier>'
+        for r in rng.sample(_RESOURCES, rng.randint(1, 7))) + "</external-identifiers>")
+    p.append("<external-links>" + "".join(
+        f'<external-link>{_el("resource", r)}{_el("url", f"http://www.{r.lower()}.com/{did}")}</external-link>'
+        for r in rng.sample(["RxList", "Drugs.com", "PDRhealth"], rng.randint(0, 3))) + "</external-links>")
+    p.append("<pathways>" + "".join(
+        f'<pathway>{_el("smpdb-id", f"SMP{rng.randint(1, 99999):07d}")}{_el("name", f"{name} Action Pathway")}'
+        f'{_el("category", "drug_action")}</pathway>'
+        for _ in range(rng.choice([0, 0, 0, 1]))) + "</pathways>")
+    p.append("<reactions>" + "".join(
+        f'<reaction>{_el("sequence", k + 1)}'
+        f'<left-element>{_el("drugbank-id", did)}{_el("name", name)}</left-element>'
+        f'<right-element>{_el("drugbank-id", f"DBMET{rng.randint(1, 99999):05d}")}{_el("name", f"{name} metabolite")}</right-element>'
+        f'<enzymes/></reaction>'
+        for k in range(_count(rng, 0.5, 10))) + "</reactions>")
+    p.append("<snp-effects>" + "".join(
+        f'<effect>{_el("protein-name", rng.choice(_ENTITIES))}{_el("rs-id", f"rs{rng.randint(1, 99999999)}")}'
+        f'{_el("description", _sentence(rng, 10))}</effect>'
+        for _ in range(_count(rng, 0.2, 10))) + "</snp-effects>")
+
+    for group, tag, mean in (("targets", "target", cfg.targets), ("enzymes", "enzyme", 1.0),
+                             ("carriers", "carrier", 0.2), ("transporters", "transporter", 0.4)):
+        p.append(f"<{group}>" + "".join(_polypeptide_actor(rng, tag, k)
+                                        for k in range(_count(rng, mean, 300))) + f"</{group}>")
+
+    p.append("<calculated-properties>" + "".join(
+        f'<property>{_el("kind", k)}{_el("value", round(rng.uniform(-5, 900), 3))}{_el("source", "ALOGPS")}</property>'
+        for k in rng.sample(_PROPS, rng.randint(0, len(_PROPS)))) + "</calculated-properties>")
+    p.append("</drug>\n")
+    return "".join(p)
+
+
+def generate(out: Path, n_drugs: int, seed: int = 42, products: float = 4.0,
+             interactions: float = 20.0, targets: float = 2.0) -> Path:
+    """Write a synthetic DrugBank dump with *n_drugs* drugs to *out*."""
+    rng = random.Random(seed)
+    ids = [f"DB{i + 1:05d}" for i in range(n_drugs)]
+    names = _names(rng, n_drugs)
+    cfg = argparse.Namespace(products=products, interactions=interactions, targets=targets)
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        _write(f, rng, ids, names, cfg)
+    return out
+
+
+def _write(f: TextIO, rng: random.Random, ids: List[str], names: List[str], cfg) -> None:
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<drugbank xmlns="http://www.drugbank.ca" version="5.1" exported-on="2024-01-03">\n')
+    for i in range(len(ids)):
+        f.write(_drug(rng, i, ids, names, cfg))
+    f.write("</drugbank>\n")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Generate synthetic DrugBank-schema XML.")
+    ap.add_argument("--drugs", type=int, default=1000, help="number of <drug> records (default: 1000)")
+    ap.add_argument("--out", type=Path, default=Path("data/raw/synthetic_database.xml"),
+                    help="output file (default: data/raw/synthetic_database.xml)")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--products", type=float, default=4.0, help="mean products per drug")
+    ap.add_argument("--interactions", type=float, default=20.0, help="mean drug-interactions per drug")
+    ap.add_argument("--targets", type=float, default=2.0, help="mean targets per drug")
+    args = ap.parse_args()
+
+    generate(args.out, args.drugs, args.seed, args.products, args.interactions, args.targets)
+    size = args.out.stat().st_size / (1024 * 1024)
+    print(f"[✓] Wrote {args.drugs:,} synthetic drugs ({size:,.1f} MB) → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
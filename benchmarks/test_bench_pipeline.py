@@ -0,0 +1,32 @@
+"""Throughput / memory benchmarks for the ETL stages."""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("lxml")
+pytest.importorskip("pandas")
+
+
+def test_xml_parse(benchmark, check_baseline, synth_xml, n_drugs):
+    from xml_parser import iter_drugs
+
+    def run():
+        return sum(1 for _ in iter_drugs(str(synth_xml)))
+
+    assert benchmark.pedantic(run, rounds=3, iterations=1) == n_drugs
+    # lxml's tree lives outside the Python heap – measure the parser's RSS instead
+    check_baseline("xml_parse", n_drugs, run, rss_script=(
+        "from xml_parser import iter_drugs\n"
+        f"for _ in iter_drugs({str(synth_xml)!r}): pass"))
+
+
+def test_triples(benchmark, check_baseline, parsed_drugs):
+    from triples_generator import drug_triples
+
+    def run():
+        triples = set()
+        for d in parsed_drugs:
+            drug_triples(d, triples)
+        return triples
+
+    assert benchmark.pedantic(run, rounds=5, iterations=1)
+    check_baseline("triples", len(parsed_drugs), run)
@@ -0,0 +1,124 @@
+"""Latency benchmarks for the query paths (CLI lookup, name resolver, interaction
+checks, FAISS retriever)."""
+import contextlib
+import io
+import itertools
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("pandas")
+
+N_QUERIES = 200
+
+
+@pytest.fixture(scope="module")
+def query_names(parsed_drugs):
+    names = [d["name"] for d in parsed_drugs]
+    return random.Random(0).sample(names, min(N_QUERIES, len(names)))
+
+
+def test_cli_query(benchmark, check_baseline, monkeypatch, parsed_drugs, triples_csv, query_names):
+    pytest.importorskip("tabulate")   # DataFrame.to_markdown
+    import cli
+    from common.name_resolver import NameResolver
+
+    resolver = NameResolver.build(parsed_drugs)
+    monkeypatch.setattr(cli, "PROCESSED_DIR", triples_csv.parent)
+    monkeypatch.setattr(cli, "load_resolver", lambda: resolver)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in query_names:
+                cli.query(name)
+
+    run()   # warm the REPL's triples cache, as after the first interactive query
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    check_baseline("cli_query", len(query_names), run)
+
+
+def test_name_resolver(benchmark, check_baseline, parsed_drugs, query_names):
+    pytest.importorskip("numpy")
+    from common.name_resolver import NameResolver
+
+    resolver = NameResolver.build(parsed_drugs)
+    rng = random.Random(1)
+    typos = []
+    for name in query_names:   # exact, one deletion, one transposition
+        i = rng.randrange(len(name) - 1)
+        typos += [name, name[:i] + name[i + 1:], name[:i] + name[i + 1] + name[i] + name[i + 2:]]
+
+    def run():
+        return [resolver.best(q) for q in typos]
+
+    hits = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert sum(m is not None for m in hits) >= 0.9 * len(typos)
+    check_baseline("name_resolver", len(typos), run)
+
+
+def test_regimen_check(benchmark, check_baseline, tmp_path, parsed_drugs):
+    pytest.importorskip("numpy")
+    from common.interactions import InteractionIndex
+
+    InteractionIndex.build(parsed_drugs).save(tmp_path)
+    index = InteractionIndex.load(tmp_path)   # memory-mapped, as in the CLI
+    ids = [d["primary_id"] for d in parsed_drugs]
+    rng = random.Random(2)
+    regimens = [rng.sample(ids, rng.randint(10, 20)) for _ in range(1000)]
+
+    def run():
+        return index.check_many(regimens)
+
+    results = benchmark.pedantic(run, rounds=3, iterations=1)
+    pairs = {frozenset((d["primary_id"], x["drugbank_id"]))
+             for d in parsed_drugs for x in d["drug_interactions"]}
+    for regimen, found in list(zip(regimens, results))[:500]:   # vs. brute-force enumeration
+        expected = {frozenset(p) for p in itertools.combinations(regimen, 2) if frozenset(p) in pairs}
+        got = [frozenset((x.a_id, x.b_id)) for x in found]
+        assert len(got) == len(set(got)) and set(got) == expected
+    # free-text tokens that are not DrugBank IDs are simply unknown, never an error
+    junk = ["草药", "Ibuprofène", "X" * 40, ""]
+    assert index.check(regimens[0] + junk) == results[0]
+    check_baseline("regimen_check", len(regimens), run)
+
+
+class _HashEncoder:
+    """Deterministic stand-in for the SentenceTransformer: this benchmark
+    measures the retrieval path, not model inference."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def encode(self, texts, normalize_embeddings=True):
+        import numpy as np
+        rng = np.random.default_rng(abs(hash(texts[0])) % 2**32)
+        v = rng.standard_normal((len(texts), self.dim)).astype("float32")
+        return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+def test_retriever_search(benchmark, check_baseline, monkeypatch, parsed_drugs, query_names):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("langchain")
+    import retriever
+    from common.name_resolver import NameResolver
+
+    dim = 384   # all-MiniLM-L6-v2
+    vecs = np.random.default_rng(0).standard_normal((len(parsed_drugs), dim)).astype("float32")
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    index = faiss.IndexFlatIP(dim)
+    index.add(vecs)
+    texts = [d.get("description") or d["name"] for d in parsed_drugs]
+    ids = [d["primary_id"] for d in parsed_drugs]
+    monkeypatch.setattr(retriever, "_RESOURCES", (_HashEncoder(dim), index, texts, ids))
+    resolver = NameResolver.build(parsed_drugs)   # not whatever name_index.pkl is on disk
+    monkeypatch.setattr(retriever, "load_resolver", lambda: resolver)
+
+    def run():
+        for q in query_names:
+            retriever.retrieve(q, 5)
+
+    benchmark.pedantic(run, rounds=3, iterations=1)
+    check_baseline("retriever_search", len(query_names), run)
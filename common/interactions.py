@@ -0,0 +1,270 @@
+"""
+Drug–drug interaction index
+───────────────────────────
+Answers "which pairs in this regimen interact?" without touching Neo4j or the
+triples CSV.
+
+• Built once from the `drug_interactions` of parsed_drugs.json.  Every DrugBank
+  ID gets a dense integer; a pair (a, b) is keyed as (min << 32) | max, so A→B
+  and B→A collapse into one entry.
+• Keys live in an open-addressing hash table (linear probing, load ≤ 0.5) of two
+  flat numpy arrays; descriptions and drug names are de-duplicated into a single
+  UTF-8 string pool.  Everything is saved as .npy files and memory-mapped on
+  load, so opening the index is instant and only touched pages are read.
+• Lookups are vectorised: all O(n²) pairs of a regimen – or of thousands of
+  regimens at once – are probed together with a handful of numpy passes.
+
+    python common/interactions.py --build
+    python common/interactions.py DB00682 DB00945 DB01050
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+IN_JSON = PROJECT_ROOT / "data" / "processed" / "parsed_drugs.json"
+INDEX_DIR = PROJECT_ROOT / "data" / "processed" / "interaction_index"
+
+FORMAT_VERSION = 1
+_EMPTY = np.uint64(0)          # pair keys are never 0: lo < hi ⇒ hi ≥ 1
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_ARRAYS = ("ids", "id_name", "table_keys", "table_vals", "pool_offsets", "pool")
+
+
+def _slots(keys: np.ndarray, bits: int) -> np.ndarray:
+    """Fibonacci hashing: top `bits` bits of key × φ·2⁶⁴."""
+    with np.errstate(over="ignore"):
+        return ((keys * _GOLDEN) >> np.uint64(64 - bits)).astype(np.int64)
+
+
+def _pair_keys(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    lo, hi = np.minimum(a, b).astype(np.uint64), np.maximum(a, b).astype(np.uint64)
+    return (lo << np.uint64(32)) | hi
+
+
+class _StringPool:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.chunks: List[bytes] = []
+
+    def add(self, s: Optional[str]) -> int:
+        s = s or ""
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.chunks)
+            self.chunks.append(s.encode("utf-8"))
+        return i
+
+    def arrays(self):
+        offsets = np.zeros(len(self.chunks) + 1, np.uint64)
+        offsets[1:] = np.cumsum([len(c) for c in self.chunks])
+        return offsets, np.frombuffer(b"".join(self.chunks), np.uint8)
+
+
+@dataclass
+class Interaction:
+    a_id: str
+    a_name: str
+    b_id: str
+    b_name: str
+    description: str
+
+
+class InteractionIndex:
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.ids = arrays["ids"]                    # sorted DrugBank IDs (bytes)
+        self.id_name = arrays["id_name"]            # id idx → pool idx of its name
+        self.table_keys = arrays["table_keys"]      # uint64 pair keys, 0 = empty
+        self.table_vals = arrays["table_vals"]      # pool idx of the description
+        self.pool_offsets = arrays["pool_offsets"]
+        self.pool = arrays["pool"]
+        self.bits = int(np.log2(len(self.table_keys)))
+
+    # ------------------------------------------------------------ build
+    @classmethod
+    def build(cls, drugs: Iterable[Dict]) -> "InteractionIndex":
+        pool = _StringPool()
+        names: Dict[str, str] = {}
+        src, dst, desc = [], [], []
+        for d in drugs:
+            pid = d.get("primary_id")
+            if not pid:
+                continue
+            names[pid] = d.get("name") or names.get(pid, "")
+            for x in d.get("drug_interactions", []):
+                other = x.get("drugbank_id")
+                if not other or other == pid:
+                    continue
+                names.setdefault(other, x.get("name") or "")
+                src.append(pid)
+                dst.append(other)
+                desc.append(pool.add(x.get("description")))
+
+        ids = np.array(sorted(names), dtype="S16")
+        id_name = np.array([pool.add(names[i.decode()]) for i in ids], np.uint32)
+        a = np.searchsorted(ids, np.array(src, dtype="S16"))
+        b = np.searchsorted(ids, np.array(dst, dtype="S16"))
+        keys = _pair_keys(a, b)
+        # DrugBank lists most pairs from both sides – keep the first description
+        keys, first = np.unique(keys, return_index=True)
+        vals = np.asarray(desc, np.uint32)[first]
+
+        bits = max(4, int(np.ceil(np.log2(max(1, 2 * len(keys))))))
+        table_keys = np.zeros(1 << bits, np.uint64)
+        table_vals = np.zeros(1 << bits, np.uint32)
+        pending = np.arange(len(keys))
+        pos = _slots(keys, bits)
+        mask = (1 << bits) - 1
+        while pending.size:   # linear probing, one vectorised round per probe step
+            slot = pos[pending]
+            free = table_keys[slot] == _EMPTY
+            _, first = np.unique(slot[free], return_index=True)
+            winners = pending[free][first]
+            table_keys[pos[winners]] = keys[winners]
+            table_vals[pos[winners]] = vals[winners]
+            placed = np.zeros(len(keys), bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            pos[pending] = (pos[pending] + 1) & mask
+
+        offsets, blob = pool.arrays()
+        return cls({"ids": ids, "id_name": id_name, "table_keys": table_keys,
+                    "table_vals": table_vals, "pool_offsets": offsets, "pool": blob})
+
+    # ------------------------------------------------------------ persistence
+    def save(self, path: Path = INDEX_DIR) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(path / f"{name}.npy", getattr(self, name))
+        meta = {"version": FORMAT_VERSION, "drugs": len(self.ids), "pairs": len(self),
+                "capacity": len(self.table_keys), "strings": len(self.pool_offsets) - 1}
+        (path / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path = INDEX_DIR) -> "InteractionIndex":
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} was built by another version – rebuild with --build")
+        return cls({name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS})
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.table_keys))
+
+    # ------------------------------------------------------------ lookup
+    def _string(self, i: int) -> str:
+        return bytes(self.pool[self.pool_offsets[i]:self.pool_offsets[i + 1]]).decode("utf-8")
+
+    def id_index(self, drug_ids: Sequence[str]) -> np.ndarray:
+        """Dense index of every ID, -1 where the ID has no known interactions."""
+        keys = [i.upper() for i in drug_ids]
+        # anything that cannot be an "S16" DrugBank ID (non-ASCII, too long) is unknown
+        ok = np.array([k.isascii() and len(k) <= 16 for k in keys], bool)
+        q = np.array([k if fits else "" for k, fits in zip(keys, ok)], dtype="S16")
+        if not len(self.ids):
+            return np.full(len(q), -1, np.int64)
+        idx = np.searchsorted(self.ids, q)
+        idx[idx == len(self.ids)] = 0
+        return np.where(ok & (self.ids[idx] == q), idx, -1)
+
+    def _probe(self, keys: np.ndarray) -> np.ndarray:
+        """Pool index of each key's description, -1 when the pair is absent."""
+        out = np.full(len(keys), -1, np.int64)
+        pos = _slots(keys, self.bits)
+        active = np.flatnonzero(keys != _EMPTY)   # key 0 is the (0, 0) self-pair, never stored
+        mask = len(self.table_keys) - 1
+        while active.size:
+            tk = self.table_keys[pos[active]]
+            hit = tk == keys[active]
+            out[active[hit]] = self.table_vals[pos[active[hit]]]
+            active = active[~hit & (tk != _EMPTY)]
+            pos[active] = (pos[active] + 1) & mask
+        return out
+
+    def check_many(self, regimens: Sequence[Sequence[str]]) -> List[List[Interaction]]:
+        """Interacting pairs of every regimen (lists of DrugBank IDs), in one probe."""
+        t0 = time.perf_counter()
+        owner, a_all, b_all = [], [], []
+        for r, regimen in enumerate(regimens):
+            idx = self.id_index(regimen)
+            idx = np.unique(idx[idx >= 0])   # "db1"/"DB1", brand + generic → one drug
+            i, j = np.triu_indices(len(idx), 1)
+            a_all.append(idx[i])
+            b_all.append(idx[j])
+            owner.append(np.full(len(i), r))
+
+        results: List[List[Interaction]] = [[] for _ in regimens]
+        if owner:
+            a, b, owner = np.concatenate(a_all), np.concatenate(b_all), np.concatenate(owner)
+            found = self._probe(_pair_keys(a, b))
+            for k in np.flatnonzero(found >= 0):
+                ia, ib = int(a[k]), int(b[k])
+                results[owner[k]].append(Interaction(
+                    self.ids[ia].decode(), self._string(int(self.id_name[ia])),
+                    self.ids[ib].decode(), self._string(int(self.id_name[ib])),
+                    self._string(int(found[k]))))
+        metrics.observe("regimen_check_batch", time.perf_counter() - t0)
+        return results
+
+    def check(self, regimen: Sequence[str]) -> List[Interaction]:
+        """Interacting pairs among the DrugBank IDs of one regimen."""
+        return self.check_many([regimen])[0]
+
+
+# ------------------------------------------------------------ shared instance
+_LOADED: Optional[InteractionIndex] = None
+
+
+def load_index(path: Path = INDEX_DIR) -> Optional[InteractionIndex]:
+    """Process-wide memory-mapped index; None (with a hint) if it has not been built."""
+    global _LOADED
+    if _LOADED is not None:
+        metrics.cache_hit("interaction_index")
+        return _LOADED
+    if not (path / "meta.json").exists():
+        print(f"[WARN] {path.name}/ not found – run `python common/interactions.py --build`")
+        return None
+    metrics.cache_miss("interaction_index")
+    _LOADED = InteractionIndex.load(path)
+    return _LOADED
+
+
+# ------------------------------------------------------------ CLI
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build or query the drug–drug interaction index.")
+    ap.add_argument("drugs", nargs="*", help="DrugBank IDs of one regimen")
+    ap.add_argument("--build", action="store_true", help=f"(re)build the index from {IN_JSON.name}")
+    ap.add_argument("--index", type=Path, default=INDEX_DIR, help="index directory")
+    metrics.add_cli_args(ap)
+    args = ap.parse_args()
+    metrics.configure_from_args("interactions", args)
+
+    if args.build:
+        if not IN_JSON.exists():
+            sys.exit(f"[ERROR] {IN_JSON} not found. Run xml_parser.py first.")
+        with metrics.stage("build_interaction_index") as st:
+            index = InteractionIndex.build(json.loads(IN_JSON.read_text(encoding="utf-8")))
+            index.save(args.index)
+            st.add(len(index))
+        print(f"[✓] Indexed {len(index):,} interacting pairs of {len(index.ids):,} drugs → {args.index}")
+
+    if args.drugs:
+        index = load_index(args.index)
+        if index is None:
+            sys.exit(1)
+        for x in index.check(args.drugs):
+            print(f"{x.a_name} ({x.a_id}) × {x.b_name} ({x.b_id}): {x.description}")
+
+
+if __name__ == "__main__":
+    main()
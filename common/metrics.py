@@ -0,0 +1,364 @@
+"""
+Stage metrics & profiling
+─────────────────────────
+One small instrumentation layer shared by the ETL scripts, kg/build_kg.py,
+rag/retriever.py and the CLI.  It works like `logging`: library code records
+into a process-wide registry, the entry-point script decides where it goes.
+
+• stage(name)        – times a block; records wall time, records/s and the
+                       block's own peak RSS (Linux: VmHWM is reset on entry via
+                       /proc/self/clear_refs; elsewhere only the process-lifetime
+                       peak is known and is reported as `process_peak_rss_mb`)
+• observe(name, s)   – one latency sample (e.g. an NER batch, a FAISS search)
+• cache_hit/miss     – counters reported as a hit rate
+• Output (on exit)   – JSONL events appended to a file, or a Prometheus text
+                       file when the path ends in `.prom`
+• --profile          – each stage also runs under cProfile → `<component>.<stage>.prof`
+                       (open with snakeviz / `python -m pstats`; for sampling
+                       flame graphs run the same command under `py-spy record`).
+                       Worker threads are only included if they run inside
+                       profile_thread() – fused_pipeline's prefetch threads do
+
+Scripts opt in with `--metrics-out PATH` / `--profile`, or through the
+$DRUG_METRICS_OUT / $DRUG_PROFILE environment variables, which the pipeline
+runner passes down to its subprocesses.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import resource  # POSIX only
+except ImportError:  # Windows
+    resource = None
+
+ENV_OUT = "DRUG_METRICS_OUT"
+ENV_PROFILE = "DRUG_PROFILE"
+ENV_RSS_OUT = "DRUG_RSS_OUT"   # set by the pipeline runner for each stage subprocess
+PROFILE_DIR = Path("data/processed/profiles")
+
+
+def _vm_hwm_mb() -> Optional[float]:
+    """Linux: VmHWM (peak RSS since exec or the last reset), in MB."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+_HWM_BEFORE_RESET = 0.0   # largest VmHWM seen before a reset
+
+
+def _reset_hwm() -> bool:
+    """Start a fresh VmHWM window (Linux ≥ 4.0); False where unsupported."""
+    global _HWM_BEFORE_RESET
+    hwm = _vm_hwm_mb()
+    if hwm is None:
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        return False
+    _HWM_BEFORE_RESET = max(_HWM_BEFORE_RESET, hwm)
+    return True
+
+
+def peak_rss_mb() -> Optional[float]:
+    """High-water mark of this process's own resident set size, in MB."""
+    # Linux: VmHWM is reset by exec, whereas ru_maxrss of a subprocess starts from
+    # the RSS its parent had at fork time
+    hwm = _vm_hwm_mb()
+    if hwm is not None:
+        return max(hwm, _HWM_BEFORE_RESET)
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _quantile(sorted_vals: List[float], q: float) -> float:
+    return sorted_vals[min(len(sorted_vals) - 1, int(q * len(sorted_vals)))]
+
+
+@dataclass
+class Stage:
+    """Handle yielded by `stage()`; call `add(n)` as records are processed."""
+    name: str
+    records: int = 0
+    wall_s: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    extra: Dict = field(default_factory=dict)
+    rss_per_stage: bool = True   # False: only the process-lifetime peak was available
+
+    def add(self, n: int = 1) -> None:
+        self.records += n
+
+    def as_event(self) -> Dict:
+        return {
+            "type":          "stage",
+            "name":          self.name,
+            "wall_s":        round(self.wall_s, 4),
+            "records":       self.records,
+            "records_per_s": round(self.records / self.wall_s, 1) if self.wall_s and self.records else None,
+            "peak_rss_mb" if self.rss_per_stage else "process_peak_rss_mb":
+                None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+            **self.extra,
+        }
+
+
+class Registry:
+    def __init__(self):
+        self.component = Path(sys.argv[0]).stem or "python"
+        self.out: Optional[Path] = None
+        self.profile = False
+        self.stages: List[Stage] = []
+        self.latencies: Dict[str, List[float]] = {}
+        self.cache: Dict[str, List[int]] = {}   # name → [hits, misses]
+        self.lock = threading.Lock()
+        self._thread_profiles: Optional[List[cProfile.Profile]] = None   # of the open stage
+        self._open: List[Stage] = []   # stages whose RSS window is running
+
+    # ------------------------------------------------------------ recording
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Stage]:
+        st = Stage(name)
+        prof = cProfile.Profile() if self.profile else None
+        outer, self._thread_profiles = self._thread_profiles, []
+        self._rss_checkpoint()   # enclosing stages keep their peak across the reset
+        st.rss_per_stage = _reset_hwm()
+        with self.lock:
+            self._open.append(st)
+        t0 = time.perf_counter()
+        if prof:
+            prof.enable()
+        try:
+            yield st
+        finally:
+            if prof:
+                prof.disable()
+            st.wall_s = time.perf_counter() - t0
+            self._rss_checkpoint()
+            with self.lock:
+                self._open.remove(st)
+            if not st.rss_per_stage:
+                st.peak_rss_mb = peak_rss_mb()
+            threads, self._thread_profiles = self._thread_profiles, outer
+            with self.lock:
+                self.stages.append(st)
+            if prof:
+                stats = pstats.Stats(prof)
+                for p in threads:
+                    stats.add(p)
+                PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+                path = PROFILE_DIR / f"{self.component}.{name}.prof"
+                stats.dump_stats(path)
+                print(f"[INFO] cProfile for '{name}' → {path}")
+
+    def _rss_checkpoint(self) -> None:
+        """Fold the current VmHWM window into every open stage's peak."""
+        hwm = _vm_hwm_mb()
+        if hwm is None:
+            return
+        with self.lock:
+            for st in self._open:
+                if st.rss_per_stage:
+                    st.peak_rss_mb = max(st.peak_rss_mb or 0.0, hwm)
+
+    @contextmanager
+    def profile_thread(self) -> Iterator[None]:
+        """Wrap the body of a worker thread so --profile covers it too.
+
+        cProfile only sees the thread that enabled it (up to Python 3.11); the
+        thread's profile is merged into the stage that is open when it starts."""
+        target = self._thread_profiles
+        prof = cProfile.Profile() if self.profile and target is not None else None
+        if prof:
+            try:
+                prof.enable()
+            except ValueError:   # 3.12+: the stage's profiler already sees every thread
+                prof = None
+        try:
+            yield
+        finally:
+            if prof:
+                prof.disable()
+                with self.lock:
+                    target.append(prof)
+
+    def record(self, name: str, wall_s: float, records: int = 0,
+               peak_rss_mb: Optional[float] = None, **extra) -> None:
+        """Record a stage measured elsewhere (e.g. a subprocess)."""
+        with self.lock:
+            self.stages.append(Stage(name, records, wall_s, peak_rss_mb, extra))
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def cache_hit(self, name: str) -> None:
+        with self.lock:
+            self.cache.setdefault(name, [0, 0])[0] += 1
+
+    def cache_miss(self, name: str) -> None:
+        with self.lock:
+            self.cache.setdefault(name, [0, 0])[1] += 1
+
+    # ------------------------------------------------------------ output
+    def events(self) -> List[Dict]:
+        with self.lock:
+            evs = [st.as_event() for st in self.stages]
+            for name, vals in self.latencies.items():
+                s = sorted(vals)
+                evs.append({
+                    "type":  "latency",
+                    "name":  name,
+                    "count": len(s),
+                    "sum_s": round(sum(s), 6),
+                    "p50_s": round(_quantile(s, 0.50), 6),
+                    "p95_s": round(_quantile(s, 0.95), 6),
+                    "p99_s": round(_quantile(s, 0.99), 6),
+                    "max_s": round(s[-1], 6),
+                })
+            for name, (hits, misses) in self.cache.items():
+                total = hits + misses
+                evs.append({
+                    "type":     "cache",
+                    "name":     name,
+                    "hits":     hits,
+                    "misses":   misses,
+                    "hit_rate": round(hits / total, 4) if total else None,
+                })
+        return evs
+
+    def flush(self) -> None:
+        """Write everything recorded so far, then start afresh."""
+        if self.out is None:
+            return
+        evs = self.events()
+        if not evs:
+            return
+        with self.lock:
+            self.stages.clear()
+            self.latencies.clear()
+            self.cache.clear()
+        self.out.parent.mkdir(parents=True, exist_ok=True)
+        if self.out.suffix == ".prom":
+            # one file per component, ready for node_exporter's textfile collector
+            path = self.out.with_name(f"{self.out.stem}_{self.component}.prom")
+            path.write_text(_prometheus(self.component, evs), encoding="utf-8")
+        else:
+            ts = time.strftime("%Y-%m-%dT%H:%M:%S")
+            with open(self.out, "a", encoding="utf-8") as f:
+                for ev in evs:
+                    f.write(json.dumps({"ts": ts, "component": self.component, **ev}) + "\n")
+
+
+def _prometheus(component: str, events: List[Dict]) -> str:
+    series: Dict[str, List[str]] = {}
+
+    def put(metric: str, kind: str, labels: Dict, value, family: Optional[str] = None) -> None:
+        if value is None:
+            return
+        lbl = ",".join(f'{k}="{v}"' for k, v in {"component": component, **labels}.items())
+        head = f"# TYPE {family or metric} {kind}"
+        series.setdefault(head, []).append(f"{metric}{{{lbl}}} {value}")
+
+    for ev in events:
+        if ev["type"] == "stage":
+            lbl = {"stage": ev["name"]}
+            put("drug_stage_wall_seconds", "gauge", lbl, ev["wall_s"])
+            put("drug_stage_records_total", "gauge", lbl, ev["records"])
+            put("drug_stage_records_per_second", "gauge", lbl, ev["records_per_s"])
+            for key, metric in (("peak_rss_mb", "drug_stage_peak_rss_bytes"),
+                                ("process_peak_rss_mb", "drug_process_peak_rss_bytes")):
+                if ev.get(key) is not None:
+                    put(metric, "gauge", lbl, int(ev[key] * 1024 * 1024))
+        elif ev["type"] == "latency":
+            lbl = {"op": ev["name"]}
+            for q in ("50", "95", "99"):
+                put("drug_latency_seconds", "summary", {**lbl, "quantile": str(int(q) / 100)}, ev[f"p{q}_s"])
+            put("drug_latency_seconds_sum", "summary", lbl, ev["sum_s"], "drug_latency_seconds")
+            put("drug_latency_seconds_count", "summary", lbl, ev["count"], "drug_latency_seconds")
+        elif ev["type"] == "cache":
+            lbl = {"cache": ev["name"]}
+            put("drug_cache_hits_total", "counter", lbl, ev["hits"])
+            put("drug_cache_misses_total", "counter", lbl, ev["misses"])
+
+    return "".join(f"{head}\n" + "\n".join(rows) + "\n" for head, rows in series.items())
+
+
+# ------------------------------------------------------------ module-level API
+_REGISTRY = Registry()
+atexit.register(_REGISTRY.flush)
+
+
+def _report_peak_rss() -> None:
+    """Hand this process's peak RSS to the parent that asked for it via $DRUG_RSS_OUT."""
+    path, rss = os.getenv(ENV_RSS_OUT), peak_rss_mb()
+    if path and rss is not None:
+        Path(path).write_text(f"{rss:.1f}", encoding="utf-8")
+
+
+atexit.register(_report_peak_rss)
+
+stage = _REGISTRY.stage
+profile_thread = _REGISTRY.profile_thread
+record = _REGISTRY.record
+observe = _REGISTRY.observe
+cache_hit = _REGISTRY.cache_hit
+cache_miss = _REGISTRY.cache_miss
+events = _REGISTRY.events
+flush = _REGISTRY.flush
+
+
+def configure(component: Optional[str] = None,
+              out: Optional[str] = None,
+              profile: Optional[bool] = None) -> None:
+    """Set the component name and outputs; unset arguments fall back to the env."""
+    if component:
+        _REGISTRY.component = component
+    out = out or os.getenv(ENV_OUT)
+    _REGISTRY.out = Path(out) if out else None
+    _REGISTRY.profile = bool(profile) or os.getenv(ENV_PROFILE, "") not in ("", "0")
+
+
+configure()   # honour $DRUG_METRICS_OUT / $DRUG_PROFILE even without a CLI
+
+
+def add_cli_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--metrics-out", metavar="PATH", default=None,
+                    help=f"append stage metrics as JSONL, or write Prometheus text if PATH "
+                         f"ends in .prom (default: ${ENV_OUT})")
+    ap.add_argument("--profile", action="store_true",
+                    help=f"run each stage under cProfile → {PROFILE_DIR}/<component>.<stage>.prof")
+
+
+def configure_from_args(component: str, args: argparse.Namespace) -> None:
+    configure(component, args.metrics_out, args.profile)
+
+
+def init_cli(component: str, description: Optional[str] = None) -> argparse.Namespace:
+    """For scripts without their own CLI: parse just --metrics-out/--profile."""
+    ap = argparse.ArgumentParser(description=description)
+    add_cli_args(ap)
+    args = ap.parse_args()
+    configure_from_args(component, args)
+    return args
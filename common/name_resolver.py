@@ -0,0 +1,370 @@
+"""
+Drug-name resolver
+──────────────────
+Maps whatever the user typed – a brand, a synonym, a misspelling, a DrugBank ID
+or a CAS number – to the canonical (primary_id, name) of a parsed drug.
+
+• Aliases come from `name`, `synonyms`, `products[].name`, `primary_id`,
+  `secondary_ids` and `cas_number` in parsed_drugs.json.
+• Lookup order:
+    1. exact match on the normalised alias (dict, O(1))
+    2. SymSpell-style deletion dictionary: aliases and queries are expanded into
+       their single-character deletions (of the first PREFIX_LEN characters), so
+       any one edit – a wrong, missing or extra letter, or a transposition –
+       shares a deletion with the alias; candidates are verified with an
+       edit-distance check.  Deletions are kept as a sorted array of CRC32
+       hashes – a few tens of MB and one binary search per query (sub-ms).
+    3. character-trigram index (CSR posting lists) scored by Dice similarity,
+       for anything further off, e.g. two substitutions (~1 ms at 20k drugs)
+• The index is pickled to data/processed/name_index.pkl:
+
+    python common/name_resolver.py --build          # after xml_parser.py
+    python common/name_resolver.py "coumadn" "DB00682" "50-78-2"
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pickle
+import re
+import sys
+import time
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+IN_JSON = PROJECT_ROOT / "data" / "processed" / "parsed_drugs.json"
+INDEX_PATH = PROJECT_ROOT / "data" / "processed" / "name_index.pkl"
+
+FORMAT_VERSION = 1
+PREFIX_LEN = 24    # SymSpell prefix length – longer aliases only index their prefix
+MAX_EDIT = 2       # max Damerau–Levenshtein distance accepted from step 2
+MIN_DICE = 0.5     # min trigram similarity accepted from step 3
+
+# lower rank wins when several drugs share an alias
+KIND_RANK = {"primary_id": 0, "name": 1, "secondary_id": 2, "cas_number": 2,
+             "synonym": 3, "product": 4}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_WORD = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-]*")
+
+
+def normalize(s: str) -> str:
+    """Casefold, strip accents and collapse punctuation/whitespace to single spaces."""
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(c for c in s if not unicodedata.combining(c)).casefold()
+    return _NON_ALNUM.sub(" ", s).strip()
+
+
+def _deletes(s: str) -> List[int]:
+    """CRC32 of the prefix itself and of every single-character deletion of it."""
+    p = s[:PREFIX_LEN].encode()
+    return list({zlib.crc32(p)} | {zlib.crc32(p[:i] + p[i + 1:]) for i in range(len(p))})
+
+
+def _trigrams(s: str) -> set:
+    s = f"  {s} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int = MAX_EDIT) -> int:
+    """Optimal-string-alignment distance; returns limit + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            v = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                v = min(v, prev2[j - 2] + 1)
+            cur[j] = v
+            row_min = min(row_min, v)
+        if row_min > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+@dataclass
+class Match:
+    drug_id: str
+    name: str
+    alias: str       # the alias that matched, as stored (original spelling)
+    kind: str        # name | synonym | product | primary_id | secondary_id | cas_number
+    method: str      # exact | edit | ngram
+    score: float     # 1.0 for exact, decreasing with distance / dissimilarity
+
+
+class NameResolver:
+    def __init__(self):
+        self.drugs: List[Tuple[str, str]] = []          # drug idx → (primary_id, name)
+        self.aliases: List[str] = []                    # alias idx → original spelling
+        self.keys: List[str] = []                       # alias idx → normalised key
+        self.targets: List[Tuple[int, str]] = []        # alias idx → (drug idx, kind)
+        self.exact: Dict[str, int] = {}                 # key → alias idx
+        # deletion dictionary: sorted CRC32s and the alias each came from
+        self.del_hash = np.empty(0, np.uint32)
+        self.del_alias = np.empty(0, np.uint32)
+        # trigram postings in CSR form: grams[g] → row, alias idxs in
+        # gram_alias[gram_ptr[row]:gram_ptr[row + 1]]
+        self.grams: Dict[str, int] = {}
+        self.gram_ptr = np.zeros(1, np.int64)
+        self.gram_alias = np.empty(0, np.uint32)
+        self.n_grams = np.empty(0, np.uint16)          # alias idx → |trigrams|
+        self.rank = np.empty(0, np.uint8)              # alias idx → KIND_RANK
+
+    # ------------------------------------------------------------ build
+    @classmethod
+    def build(cls, drugs: Iterable[Dict]) -> "NameResolver":
+        self = cls()
+        for d in drugs:
+            if not d.get("name") or not d.get("primary_id"):
+                continue
+            di = len(self.drugs)
+            self.drugs.append((d["primary_id"], d["name"]))
+            self._add(d["primary_id"], di, "primary_id")
+            self._add(d["name"], di, "name")
+            for sid in d.get("secondary_ids", []):
+                self._add(sid, di, "secondary_id")
+            if d.get("cas_number"):
+                self._add(d["cas_number"], di, "cas_number")
+            for syn in d.get("synonyms", []):
+                self._add(syn, di, "synonym")
+            for p in d.get("products", []):
+                if p.get("name"):
+                    self._add(p["name"], di, "product")
+
+        hashes: List[int] = []
+        owners: List[int] = []
+        postings: Dict[str, List[int]] = {}
+        n_grams = []
+        for ai, key in enumerate(self.keys):
+            dels = _deletes(key)
+            hashes.extend(dels)
+            owners.extend([ai] * len(dels))
+            grams = _trigrams(key)
+            n_grams.append(len(grams))
+            for g in grams:
+                postings.setdefault(g, []).append(ai)
+
+        h = np.asarray(hashes, np.uint32)
+        order = np.argsort(h, kind="stable")
+        self.del_hash = h[order]
+        self.del_alias = np.asarray(owners, np.uint32)[order]
+
+        self.grams = {g: row for row, g in enumerate(postings)}
+        self.gram_ptr = np.zeros(len(postings) + 1, np.int64)
+        self.gram_ptr[1:] = np.cumsum([len(v) for v in postings.values()])
+        self.gram_alias = np.fromiter((ai for v in postings.values() for ai in v),
+                                      np.uint32, count=int(self.gram_ptr[-1]))
+        self.n_grams = np.asarray(n_grams, np.uint16)
+        self.rank = np.asarray([KIND_RANK[k] for _di, k in self.targets], np.uint8)
+        return self
+
+    def _add(self, alias: str, di: int, kind: str) -> None:
+        key = normalize(alias)
+        if not key:
+            return
+        ai = self.exact.get(key)
+        if ai is None:
+            self.exact[key] = len(self.aliases)
+            self.aliases.append(alias)
+            self.keys.append(key)
+            self.targets.append((di, kind))
+        elif KIND_RANK[kind] < KIND_RANK[self.targets[ai][1]]:
+            self.targets[ai] = (di, kind)
+
+    # ------------------------------------------------------------ persistence
+    def save(self, path: Path = INDEX_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        state = {"version": FORMAT_VERSION, **self.__dict__}
+        with open(path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> "NameResolver":
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state.pop("version", None) != FORMAT_VERSION:
+            raise ValueError(f"{path} was built by another version – rebuild with --build")
+        self = cls()
+        self.__dict__.update(state)
+        return self
+
+    # ------------------------------------------------------------ lookup
+    def _match(self, ai: int, method: str, score: float) -> Match:
+        di, kind = self.targets[ai]
+        pid, name = self.drugs[di]
+        return Match(pid, name, self.aliases[ai], kind, method, round(score, 4))
+
+    def resolve(self, query: str, limit: int = 5) -> List[Match]:
+        """Best matches for *query*, best first; empty if nothing is close enough."""
+        t0 = time.perf_counter()
+        try:
+            return self._resolve(normalize(query), limit)
+        finally:
+            metrics.observe("name_resolve", time.perf_counter() - t0)
+
+    def _resolve(self, key: str, limit: int) -> List[Match]:
+        if not key:
+            return []
+        ai = self.exact.get(key)
+        if ai is not None:
+            return [self._match(ai, "exact", 1.0)]
+        return self._edit(key, limit) or self._ngram(key, limit)
+
+    def _edit(self, key: str, limit: int) -> List[Match]:
+        q = np.asarray(_deletes(key), np.uint32)
+        lo = np.searchsorted(self.del_hash, q, "left")
+        hi = np.searchsorted(self.del_hash, q, "right")
+        cands = {int(ai) for a, b in zip(lo, hi) if b > a for ai in self.del_alias[a:b]}
+
+        scored = []
+        for ai in cands:
+            dist = edit_distance(key, self.keys[ai])
+            if dist <= MAX_EDIT:
+                scored.append((dist, self.rank[ai], ai))
+        scored.sort()
+        return self._dedupe(
+            ((ai, "edit", 1 - dist / max(len(key), len(self.keys[ai])))
+             for dist, _rank, ai in scored), limit)
+
+    def _ngram(self, key: str, limit: int) -> List[Match]:
+        rows = [self.grams[g] for g in _trigrams(key) if g in self.grams]
+        if not rows:
+            return []
+        n_q = len(_trigrams(key))
+        hits = np.concatenate([self.gram_alias[self.gram_ptr[r]:self.gram_ptr[r + 1]] for r in rows])
+        cand, overlap = np.unique(hits, return_counts=True)
+        dice = 2 * overlap / (n_q + self.n_grams[cand])
+        keep = dice >= MIN_DICE
+        cand, dice = cand[keep], dice[keep]
+        if not len(cand):
+            return []
+        # best dice first, then preferred alias kind; a few spares for per-drug dedupe
+        top = np.lexsort((self.rank[cand], -dice))[: limit * 4]
+        return self._dedupe(((int(cand[i]), "ngram", float(dice[i])) for i in top), limit)
+
+    def _dedupe(self, hits, limit: int) -> List[Match]:
+        """One Match per drug, keeping the first (best) alias."""
+        seen, out = set(), []
+        for ai, method, score in hits:
+            di = self.targets[ai][0]
+            if di not in seen:
+                seen.add(di)
+                out.append(self._match(ai, method, score))
+                if len(out) == limit:
+                    break
+        return out
+
+    def best(self, query: str) -> Optional[Match]:
+        hits = self.resolve(query, limit=1)
+        return hits[0] if hits else None
+
+    def annotate_text(self, text: str, max_words: int = 4) -> str:
+        """Append the canonical name after every drug alias found in free text,
+        e.g. "Is Coumadin safe?" → "Is Coumadin (Warfarin) safe?".
+
+        Multi-word spans are matched exactly (longest first); single capitalised
+        words of ≥ 6 letters are also tried against the deletion dictionary."""
+        words = list(_WORD.finditer(text))
+        out, pos, i = [], 0, 0
+        while i < len(words):
+            hit = None
+            for n in range(min(max_words, len(words) - i), 0, -1):
+                span = text[words[i].start():words[i + n - 1].end()]
+                key = normalize(span)
+                ai = self.exact.get(key)
+                if ai is not None and (len(key) >= 4 or self.targets[ai][1] == "primary_id"):
+                    hit = (n, self._match(ai, "exact", 1.0))
+                    break
+            if hit is None and words[i].group()[:1].isupper() and len(words[i].group()) >= 6:
+                m = self._resolve(normalize(words[i].group()), 1)
+                if m and m[0].method == "edit" and m[0].score >= 0.8:
+                    hit = (1, m[0])
+            if hit is None:
+                i += 1
+                continue
+            n, m = hit
+            end = words[i + n - 1].end()
+            out.append(text[pos:end])
+            if normalize(text[words[i].start():end]) != normalize(m.name):
+                out.append(f" ({m.name})")
+            pos, i = end, i + n
+        out.append(text[pos:])
+        return "".join(out)
+
+
+# ------------------------------------------------------------ shared instance
+_LOADED: Dict[Path, Tuple[int, NameResolver]] = {}
+_WARNED: set = set()
+
+
+def load_resolver(path: Path = INDEX_PATH) -> Optional[NameResolver]:
+    """Process-wide cached index; None (with a one-time hint) if it has not been built."""
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        if path not in _WARNED:
+            _WARNED.add(path)
+            print(f"[WARN] {path.name} not found – run `python common/name_resolver.py --build` "
+                  "for fuzzy drug-name matching")
+        return None
+    hit = _LOADED.get(path)
+    if hit and hit[0] == mtime:
+        metrics.cache_hit("name_index")
+        return hit[1]
+    metrics.cache_miss("name_index")
+    resolver = NameResolver.load(path)
+    _LOADED[path] = (mtime, resolver)
+    return resolver
+
+
+# ------------------------------------------------------------ CLI
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build or query the drug-name index.")
+    ap.add_argument("queries", nargs="*", help="names / IDs to resolve")
+    ap.add_argument("--build", action="store_true", help=f"(re)build the index from {IN_JSON.name}")
+    ap.add_argument("--index", type=Path, default=INDEX_PATH, help="index file")
+    ap.add_argument("--limit", "-n", type=int, default=5, help="matches per query (default: 5)")
+    metrics.add_cli_args(ap)
+    args = ap.parse_args()
+    metrics.configure_from_args("name_resolver", args)
+
+    if args.build:
+        if not IN_JSON.exists():
+            sys.exit(f"[ERROR] {IN_JSON} not found. Run xml_parser.py first.")
+        with metrics.stage("build_name_index") as st:
+            drugs = json.loads(IN_JSON.read_text(encoding="utf-8"))
+            resolver = NameResolver.build(drugs)
+            resolver.save(args.index)
+            st.add(len(resolver.aliases))
+        print(f"[✓] Indexed {len(resolver.aliases):,} aliases of {len(resolver.drugs):,} drugs → {args.index}")
+
+    if args.queries:
+        resolver = load_resolver(args.index)
+        if resolver is None:
+            sys.exit(1)
+        for q in args.queries:
+            hits = resolver.resolve(q, args.limit)
+            if not hits:
+                print(f"{q!r}: no match")
+            for m in hits:
+                print(f"{q!r} → {m.name} ({m.drug_id})  via {m.kind} {m.alias!r}  "
+                      f"[{m.method}, {m.score:.2f}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,8 +10,12 @@ Usage examples
 ❯ python interface/cli.py parse‑xml        # Step 1  – parse DrugBank XML
 ❯ python interface/cli.py ner             # Step 2  – BioBERT NER over texts
 ❯ python interface/cli.py triples         # Step 3  – generate KG triples
-❯ python interface/cli.py all             # Run the entire ETL in sequence
+❯ python interface/cli.py all             # Run the ETL DAG (skips fresh stages)
+❯ python interface/cli.py all --force     # Rebuild every stage
+❯ python interface/cli.py all --fused     # parse → NER → triples in one process
 ❯ python interface/cli.py query "Lepirudin"  # Show relations for a drug
+❯ python interface/cli.py interactions warfarin aspirin ibuprofen
+❯ python interface/cli.py interactions --batch regimens.txt > checked.jsonl
 
 If invoked **without** arguments the tool drops into an interactive REPL:
 
@@ -30,11 +34,15 @@ All other heavy‑lifting lives in the existing pipeline scripts under
 from __future__ import annotations
 
 import argparse
+import json
+import os
 import subprocess
 import sys
+import time
+from dataclasses import asdict
 from pathlib import Path
 from textwrap import dedent
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 
 try:
     import pandas as pd  # type: ignore
@@ -43,6 +51,13 @@ except ImportError as exc:
     raise exc
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))   # → `common`
+
+from common import metrics
+from common.interactions import load_index as load_interaction_index
+from common.name_resolver import Match, load_resolver
+from pipeline import run_pipeline
+
 DATA_DIR = PROJECT_ROOT / "data"
 PROCESSED_DIR = DATA_DIR / "processed"
 RAW_DIR = DATA_DIR / "raw"
@@ -79,10 +94,63 @@ def triples() -> None:
     _run_step(PROJECT_ROOT / "preprocessing" / "triples_generator.py")
 
 
-def pipeline_all() -> None:
-    """Run the full ETL (parse → NER → triples) in sequence."""
-    for fn in (parse_xml, ner, triples):
-        fn()
+def pipeline_all(force: bool = False, jobs: int = 2) -> None:
+    """Run the full ETL DAG, skipping stages whose inputs, code and config are unchanged."""
+    run_pipeline(force=force, jobs=jobs)
+
+
+def pipeline_fused(write_intermediate: bool = False) -> None:
+    """Run parse → NER → triples as one streaming process (no JSON round trips)."""
+    extra = ["--write-parsed", "--write-nlp"] if write_intermediate else []
+    _run_step(PROJECT_ROOT / "preprocessing" / "fused_pipeline.py", extra)
+
+
+_TRIPLES: dict = {}   # mtime → (df, title‑cased source, title‑cased target)
+
+
+def _load_triples(csv_path: Path):
+    """Read kg_triples.csv once per REPL session (re‑read if the file changes)."""
+    mtime = csv_path.stat().st_mtime_ns
+    if mtime in _TRIPLES:
+        metrics.cache_hit("kg_triples_csv")
+        return _TRIPLES[mtime]
+    metrics.cache_miss("kg_triples_csv")
+    df = pd.read_csv(csv_path)
+    _TRIPLES.clear()
+    _TRIPLES[mtime] = (df, df["source"].str.title(), df["target"].str.title())
+    return _TRIPLES[mtime]
+
+
+def _lookup(term: str) -> List[Match]:
+    resolver = load_resolver()
+    return resolver.resolve(term, limit=3) if resolver else []
+
+
+def _note(term: str, m: Match, log: Callable[[str], None] = print) -> None:
+    """Say how *term* was resolved – unless it was typed exactly as a name or ID."""
+    if m.method != "exact" or m.kind in ("product", "synonym"):
+        log(f"[i] '{term}' → {m.name} ({m.drug_id}; {m.method} match on {m.kind} '{m.alias}')")
+
+
+def _suggest(term: str, hits: List[Match], log: Callable[[str], None] = print) -> None:
+    log(f"[i] '{term}' not found – did you mean: {', '.join(h.name for h in hits)}?")
+
+
+def _resolve(term: str, log: Callable[[str], None] = print) -> Optional[Match]:
+    """Exact or edit‑distance match for *term*; looser trigram hits are only suggested."""
+    hits = _lookup(term)
+    if not hits:
+        return None
+    m = hits[0]
+    if m.method == "ngram":
+        _suggest(term, hits, log)
+        return None
+    _note(term, m, log)
+    return m
+
+
+def _relations(df, src, tgt, name: str):
+    return df.loc[(src == name.title()) | (tgt == name.title())]
 
 
 def query(drug_name: str, max_rows: int = 20) -> None:
@@ -91,10 +159,26 @@ def query(drug_name: str, max_rows: int = 20) -> None:
     if not csv_path.exists():
         sys.exit("[x] kg_triples.csv not found – run `triples` or `all` first.")
 
-    df = pd.read_csv(csv_path)
-    mask = (df["source"].str.title() == drug_name.title()) |\
-           (df["target"].str.title() == drug_name.title())
-    subset = df.loc[mask]
+    t0 = time.perf_counter()
+    df, src, tgt = _load_triples(csv_path)
+    hits = _lookup(drug_name)
+    m = hits[0] if hits else None
+    if m is not None and m.method == "exact":   # a name, ID, synonym or brand of a drug
+        _note(drug_name, m)
+        drug_name = m.name
+        subset = _relations(df, src, tgt, drug_name)
+    else:
+        # literal rows first: entity targets ("Heparin") must not be rewritten to
+        # a look‑alike drug; typos only resolve when nothing matches literally
+        subset = _relations(df, src, tgt, drug_name)
+        if subset.empty and m is not None:
+            if m.method == "edit":
+                _note(drug_name, m)
+                drug_name = m.name
+                subset = _relations(df, src, tgt, drug_name)
+            else:
+                _suggest(drug_name, hits)
+    metrics.observe("query", time.perf_counter() - t0)
 
     if subset.empty:
         print(f"[!] No relations found for '{drug_name}'.")
@@ -102,6 +186,71 @@ def query(drug_name: str, max_rows: int = 20) -> None:
 
     print(subset.head(max_rows).to_markdown(index=False))
 
+
+def _regimen_ids(tokens: List[str], index, cache: dict,
+                 log: Callable[[str], None] = print) -> Tuple[List[str], List[str]]:
+    """Resolve names/brands/IDs → (DrugBank IDs, tokens that matched no drug)."""
+    ids, unresolved = [], []
+    for t in (t.strip() for t in tokens):
+        if not t:
+            continue
+        if t not in cache:
+            m = _resolve(t, log)
+            if m is not None:
+                cache[t] = m.drug_id
+            else:   # IDs of interaction partners that are not parsed drugs themselves
+                cache[t] = t.upper() if index.id_index([t])[0] >= 0 else None
+        (ids if cache[t] else unresolved).append(cache[t] or t)
+    return ids, unresolved
+
+
+def interactions(drugs: List[str], batch: Optional[Path] = None) -> None:
+    """Check every pair of a regimen (or of each line of *batch*) for interactions."""
+    if bool(drugs) == (batch is not None):
+        sys.exit("[x] Give either the drugs of one regimen or --batch FILE.")
+    index = load_interaction_index()
+    if index is None:
+        sys.exit("[x] interaction_index/ not found – run `all` first.")
+
+    cache: dict = {}
+    if batch is None:
+        ids, unresolved = _regimen_ids(drugs, index, cache)
+        no_data = [i for i, k in zip(ids, index.id_index(ids)) if k < 0]
+        for t in unresolved:
+            print(f"[!] '{t}' did not match any drug – not checked")
+        if no_data:
+            print(f"[!] No interaction data for {', '.join(no_data)} – not checked")
+        found = index.check(ids)
+        if not found:
+            if unresolved or no_data:
+                n = len(set(ids) - set(no_data))
+                print(f"[!] No known interactions among the {n} drug(s) that could be checked.")
+            else:
+                print("[✓] No known interactions in this regimen.")
+            return
+        rows = [(f"{x.a_name} ({x.a_id})", f"{x.b_name} ({x.b_id})", x.description) for x in found]
+        print(pd.DataFrame(rows, columns=["drug_a", "drug_b", "interaction"]).to_markdown(index=False))
+        return
+
+    # one regimen per line, drugs separated by commas → one JSON object per line
+    # on stdout; resolution notes go to stderr
+    def log(msg: str) -> None:
+        print(msg, file=sys.stderr)
+
+    lines = [l for l in batch.read_text(encoding="utf-8").splitlines() if l.strip()]
+    parsed = [_regimen_ids(l.split(","), index, cache, log) for l in lines]
+    regimens = [ids for ids, _ in parsed]
+    with metrics.stage("regimen_check") as st:
+        results = index.check_many(regimens)
+        st.add(len(regimens))
+    for (ids, unresolved), found in zip(parsed, results):
+        print(json.dumps({
+            "regimen":      ids,
+            "interactions": [asdict(x) for x in found],
+            "unresolved":   unresolved,
+            "no_data":      [i for i, k in zip(ids, index.id_index(ids)) if k < 0],
+        }, ensure_ascii=False))
+
 # ---------------------------------------------------------------------------
 # Interactive REPL (default action when no sub‑command is provided)
 # ---------------------------------------------------------------------------
@@ -132,20 +281,35 @@ def build_arg_parser() -> argparse.ArgumentParser:
             Common examples:
               python interface/cli.py all
               python interface/cli.py query "Aspirin"
+              python interface/cli.py interactions Warfarin Aspirin Ibuprofen
         """),
     )
 
+    metrics.add_cli_args(p)
+
     sub = p.add_subparsers(dest="command", help="Choose a command (default: REPL)")
 
     sub.add_parser("parse-xml", help="Step 1 – parse full_database.xml")
     sub.add_parser("ner", help="Step 2 – run BioBERT NER over descriptions")
     sub.add_parser("triples", help="Step 3 – generate KG triples CSV")
-    sub.add_parser("all", help="Run the full ETL pipeline (1→2→3)")
+    a = sub.add_parser("all", help="Run the full ETL pipeline (1→2→3), skipping fresh stages")
+    a.add_argument("--force", action="store_true", help="re‑run every stage even if up to date")
+    a.add_argument("--jobs", "-j", type=int, default=2,
+                   help="max stages to run concurrently (default: 2)")
+    a.add_argument("--fused", action="store_true",
+                   help="stream parse → NER → triples in one process (ignores the manifest)")
+    a.add_argument("--write-intermediate", action="store_true",
+                   help="with --fused: also write parsed_drugs.json and nlp_processed.json")
 
     q = sub.add_parser("query", help="Lookup relations for a drug in kg_triples.csv")
-    q.add_argument("drug", help="Drug name (case‑insensitive)")
+    q.add_argument("drug", help="Drug name, brand, synonym or DrugBank ID (typos tolerated)")
     q.add_argument("--limit", "-n", type=int, default=20, help="max rows to show (default: 20)")
 
+    i = sub.add_parser("interactions", help="Check a drug regimen for drug–drug interactions")
+    i.add_argument("drugs", nargs="*", help="Drug names, brands or DrugBank IDs of one regimen")
+    i.add_argument("--batch", type=Path,
+                   help="file with one comma‑separated regimen per line → JSON lines on stdout")
+
     return p
 
 # ---------------------------------------------------------------------------
@@ -154,6 +318,12 @@ def build_arg_parser() -> argparse.ArgumentParser:
 
 def main(argv: Optional[List[str]] = None) -> None:
     args = build_arg_parser().parse_args(argv)
+    metrics.configure_from_args("cli", args)
+    # pipeline steps run as subprocesses – hand the settings down via the env
+    if args.metrics_out:
+        os.environ[metrics.ENV_OUT] = str(Path(args.metrics_out).resolve())
+    if args.profile:
+        os.environ[metrics.ENV_PROFILE] = "1"
 
     match args.command:
         case "parse-xml":
@@ -162,10 +332,14 @@ def main(argv: Optional[List[str]] = None) -> None:
             ner()
         case "triples":
             triples()
+        case "all" if args.fused:
+            pipeline_fused(write_intermediate=args.write_intermediate)
         case "all":
-            pipeline_all()
+            pipeline_all(force=args.force, jobs=args.jobs)
         case "query":
             query(args.drug, max_rows=args.limit)
+        case "interactions":
+            interactions(args.drugs, batch=args.batch)
         case None:  # No sub‑command provided → interactive mode
             interactive_repl()
         case other:
@@ -0,0 +1,298 @@
+"""
+Drug‑Substitution PoC ─ Pipeline Orchestrator
+=============================================
+Small DAG runner behind `python interface/cli.py all`.
+
+Every stage is still a standalone script (`preprocessing/`, `common/`,
+`embeddings/`); the runner only decides *whether* and *when* to start it:
+
+* A manifest (`data/processed/pipeline_manifest.json`) records, per stage, the
+  SHA‑256 of its inputs, its code and its config.  A stage whose signature is
+  unchanged and whose outputs are still on disk is skipped.
+* The manifest is rewritten after every successful stage, so re‑running after a
+  failure resumes from the first stage that did not finish.
+* Stages whose dependencies are satisfied run concurrently (e.g. the embedding
+  build next to NER → triples).
+* Wall time and peak RSS of every stage are printed and stored in the manifest
+  (the RSS is reported by the stage process itself via `common.metrics`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from common import metrics
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+PROCESSED_DIR = DATA_DIR / "processed"
+
+MANIFEST = PROCESSED_DIR / "pipeline_manifest.json"
+
+# ---------------------------------------------------------------------------
+# Stage definitions
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Stage:
+    """One node of the ETL DAG. Paths are relative to the project root."""
+    name: str
+    script: str
+    inputs: List[str]
+    outputs: List[str]
+    deps: List[str] = field(default_factory=list)
+    args: List[str] = field(default_factory=list)
+    optional: bool = False   # stage is disabled when `script` is missing
+
+    @property
+    def script_path(self) -> Path:
+        return PROJECT_ROOT / self.script
+
+
+STAGES: List[Stage] = [
+    Stage(
+        name="parse",
+        script="preprocessing/xml_parser.py",
+        inputs=["data/raw/full_database.xml"],
+        outputs=["data/processed/parsed_drugs.json"],
+    ),
+    Stage(
+        name="ner",
+        script="preprocessing/text_processing.py",
+        inputs=["data/processed/parsed_drugs.json"],
+        outputs=["data/processed/nlp_processed.json"],
+        deps=["parse"],
+    ),
+    Stage(
+        name="triples",
+        script="preprocessing/triples_generator.py",
+        inputs=["data/processed/nlp_processed.json"],
+        outputs=["data/processed/kg_triples.csv"],
+        deps=["ner"],
+    ),
+    Stage(
+        name="names",
+        script="common/name_resolver.py",
+        inputs=["data/processed/parsed_drugs.json"],
+        outputs=["data/processed/name_index.pkl"],
+        deps=["parse"],
+        args=["--build"],
+    ),
+    Stage(
+        name="interactions",
+        script="common/interactions.py",
+        inputs=["data/processed/parsed_drugs.json"],
+        outputs=[f"data/processed/interaction_index/{f}" for f in (
+            "meta.json", "ids.npy", "id_name.npy", "table_keys.npy", "table_vals.npy",
+            "pool_offsets.npy", "pool.npy")],
+        deps=["parse"],
+        args=["--build"],
+    ),
+    Stage(
+        name="embeddings",
+        script="embeddings/embedding_utils.py",
+        inputs=["data/processed/parsed_drugs.json"],
+        outputs=["embeddings/docs.json", "embeddings/ids.json", "embeddings/faiss_index.bin"],
+        deps=["parse"],
+        args=["--build"],
+        optional=True,
+    ),
+]
+
+# ---------------------------------------------------------------------------
+# Hashing helpers
+# ---------------------------------------------------------------------------
+
+_CHUNK = 1 << 20
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class _FileHasher:
+    """Content hashes, memoised on (size, mtime_ns) so the 1.5 GB dump is not
+    re‑read on every run unless it actually changed."""
+
+    def __init__(self, cache: Dict[str, Dict]):
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def __call__(self, rel: str) -> Optional[str]:
+        path = PROJECT_ROOT / rel
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+
+        with self.lock:
+            hit = self.cache.get(rel)
+        if hit and hit["size"] == st.st_size and hit["mtime_ns"] == st.st_mtime_ns:
+            return hit["sha256"]
+
+        digest = _sha256_file(path)
+        with self.lock:
+            self.cache[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        return digest
+
+
+def _signature(stage: Stage, hasher: _FileHasher) -> Dict:
+    config = json.dumps({"args": stage.args}, sort_keys=True)
+    return {
+        "inputs": {p: hasher(p) for p in stage.inputs},
+        "code":   {stage.script: hasher(stage.script)},
+        "config": hashlib.sha256(config.encode()).hexdigest(),
+    }
+
+# ---------------------------------------------------------------------------
+# Manifest
+# ---------------------------------------------------------------------------
+
+def _load_manifest() -> Dict:
+    if MANIFEST.exists():
+        try:
+            return json.loads(MANIFEST.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            print(f"[WARN] Corrupt manifest {MANIFEST.name} – rebuilding every stage")
+    return {"stages": {}, "files": {}}
+
+
+def _save_manifest(manifest: Dict) -> None:
+    MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, MANIFEST)
+
+
+def _is_fresh(stage: Stage, sig: Dict, manifest: Dict, hasher: _FileHasher) -> bool:
+    rec = manifest["stages"].get(stage.name)
+    if not rec or rec.get("status") != "ok":
+        return False
+    if any(rec.get(k) != sig[k] for k in ("inputs", "code", "config")):
+        return False
+    # outputs must still exist and be the ones this stage wrote
+    return all(hasher(p) is not None and hasher(p) == rec["outputs"].get(p)
+               for p in stage.outputs)
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+def _run_stage(stage: Stage) -> Tuple[int, float, Optional[float]]:
+    """Run *stage* as a subprocess → (returncode, wall_s, peak_rss_mb)."""
+    cmd = [sys.executable, str(stage.script_path)] + stage.args
+    print(f"[▶] {stage.name}: {' '.join(cmd)}")
+    # the child writes its own peak RSS here on exit (common.metrics); the
+    # rusage from wait4 would include the RSS this process had at fork time
+    fd, rss_file = tempfile.mkstemp(prefix=f"{stage.name}.", suffix=".rss")
+    os.close(fd)
+    try:
+        t0 = time.perf_counter()
+        rc = subprocess.run(cmd, cwd=PROJECT_ROOT,
+                            env={**os.environ, metrics.ENV_RSS_OUT: rss_file}).returncode
+        wall = time.perf_counter() - t0
+        text = Path(rss_file).read_text(encoding="utf-8").strip()
+        rss = float(text) if text else None   # None: script does not use common.metrics
+    finally:
+        os.unlink(rss_file)
+    return rc, wall, rss
+
+
+def _select(stages: List[Stage]) -> List[Stage]:
+    """Drop optional stages whose script is absent (and anything depending on them)."""
+    keep: Dict[str, Stage] = {}
+    for st in stages:  # STAGES is listed in topological order
+        if st.optional and not st.script_path.exists():
+            print(f"[=] {st.name}: {st.script} not found – stage disabled")
+            continue
+        if all(d in keep for d in st.deps):
+            keep[st.name] = st
+    return list(keep.values())
+
+
+def run_pipeline(force: bool = False, jobs: int = 2) -> None:
+    """Run every stale stage of the DAG, `jobs` at a time. Exits non‑zero on failure."""
+    stages = _select(STAGES)
+    manifest = _load_manifest()
+    hasher = _FileHasher(manifest.setdefault("files", {}))
+    # workers add to manifest["files"] through the hasher – serialise on its lock
+    lock = hasher.lock
+
+    pending = {st.name: st for st in stages}
+    done: set[str] = set()
+    running: Dict[Future, Stage] = {}
+    failed: List[str] = []
+
+    def execute(stage: Stage) -> Optional[Dict]:
+        """Worker body: returns the manifest record, or None if skipped."""
+        sig = _signature(stage, hasher)
+        if not force and _is_fresh(stage, sig, manifest, hasher):
+            print(f"[=] {stage.name}: up to date – skipped")
+            return None
+        if any(h is None for h in sig["inputs"].values()):
+            missing = [p for p, h in sig["inputs"].items() if h is None]
+            raise FileNotFoundError(f"{stage.name}: missing input(s) {', '.join(missing)}")
+
+        rc, wall, rss = _run_stage(stage)
+        metrics.record(stage.name, wall, peak_rss_mb=rss, exit_code=rc)
+        rss_txt = f"{rss:,.0f} MB" if rss is not None else "n/a"
+        if rc != 0:
+            raise RuntimeError(f"{stage.name}: exit {rc} after {wall:,.1f}s (peak RSS {rss_txt})")
+        print(f"[✓] {stage.name}: {wall:,.1f}s, peak RSS {rss_txt}")
+
+        return {
+            **sig,
+            "status":      "ok",
+            "outputs":     {p: hasher(p) for p in stage.outputs},
+            "wall_s":      round(wall, 3),
+            "peak_rss_mb": None if rss is None else round(rss, 1),
+            "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            if not failed:
+                ready = [st for st in pending.values() if all(d in done for d in st.deps)]
+                for st in ready:
+                    del pending[st.name]
+                    running[pool.submit(execute, st)] = st
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                st = running.pop(fut)
+                try:
+                    rec = fut.result()
+                except Exception as e:
+                    print(f"[x] {e}")
+                    failed.append(st.name)
+                    with lock:
+                        manifest["stages"].pop(st.name, None)
+                        _save_manifest(manifest)
+                    continue
+                done.add(st.name)
+                with lock:
+                    if rec is not None:
+                        manifest["stages"][st.name] = rec
+                    _save_manifest(manifest)
+
+    if failed:
+        skipped = ", ".join(sorted(pending)) or "none"
+        sys.exit(f"[x] Pipeline failed at: {', '.join(failed)} (not started: {skipped}). "
+                 "Re‑run to resume.")
+    print(f"[✓] Pipeline complete – manifest → {MANIFEST.relative_to(PROJECT_ROOT)}")
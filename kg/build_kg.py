@@ -1,8 +1,14 @@
 import os
 import csv
+import sys
+import time
+from pathlib import Path
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+
 def main():
     load_dotenv()  # read .env at project root
 
@@ -18,15 +24,17 @@ def main():
     with driver.session() as session:
         # 1) Ensure indexes for fast MERGE
         print("[INFO] Creating indexes if needed…")
-        session.run("CREATE INDEX IF NOT EXISTS FOR (d:Drug)   ON (d.name)")
-        session.run("CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.value)")
+        with metrics.stage("indexes"):
+            session.run("CREATE INDEX IF NOT EXISTS FOR (d:Drug)   ON (d.name)")
+            session.run("CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.value)")
         print("[✓] Indexes ready")
 
         # 2) Stream each row as its own auto-commit transaction
         print(f"[INFO] Streaming load from {csv_path} …")
         count = 0
-        with open(csv_path, newline="", encoding="utf-8") as f:
+        with metrics.stage("load") as st, open(csv_path, newline="", encoding="utf-8") as f:
             reader = csv.DictReader(f)
+            t_batch = time.perf_counter()
             for row in reader:
                 session.run(
                     """
@@ -39,7 +47,11 @@ def main():
                     relation = row["relation"],
                 )
                 count += 1
+                st.add()
                 if count % 1000 == 0:
+                    now = time.perf_counter()
+                    metrics.observe("load_batch_1000", now - t_batch)
+                    t_batch = now
                     print(f"[INFO]  -- loaded {count} rows so far…")
 
         print(f"[✓] Streaming load complete: {count} total rows.")
@@ -48,4 +60,5 @@ def main():
 
 
 if __name__ == "__main__":
+    metrics.init_cli("build_kg", "Stream kg_triples.csv into Neo4j")
     main()
\ No newline at end of file
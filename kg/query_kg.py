@@ -1,11 +1,15 @@
 import os
 import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
 from langchain_community.graphs import Neo4jGraph
 from langchain.chains import GraphCypherQAChain
 from langchain_community.llms import Ollama
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common.name_resolver import load_resolver
+
 def main():
     load_dotenv()  # load vars from project-root/.env
 
@@ -52,7 +56,12 @@ RETURN, and (if needed) DISTINCT—but do NOT use any SQL patterns.\
     else:
         question = "What is Sprycel used for?"
 
-    # 7) Run the chain and print
+    # 7) Pin brands / synonyms / typos to the canonical Drug.name used in the KG
+    resolver = load_resolver()
+    if resolver is not None:
+        question = resolver.annotate_text(question)
+
+    # 8) Run the chain and print
     print("\n[LLM] Generating Cypher and fetching answer…\n")
     answer = chain.run(question)
     print("\n[Answer]\n", answer)
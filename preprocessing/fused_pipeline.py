@@ -0,0 +1,154 @@
+"""
+Fused ETL: parse → NER → triples in one process
+───────────────────────────────────────────────
+• Streams <drug> records straight from xml_parser.iter_drugs into
+  text_processing.annotate and triples_generator.drug_triples, without the
+  parsed_drugs.json / nlp_processed.json round trips.
+• Each stage runs in its own thread behind a bounded queue, so XML parsing
+  overlaps NER batching while memory stays capped at `--queue` records per hop.
+• Intermediate JSON files are only written when asked for (--write-parsed,
+  --write-nlp) and have the same layout as the standalone scripts' output.
+
+    python preprocessing/fused_pipeline.py
+    python preprocessing/fused_pipeline.py --write-parsed --write-nlp
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import textwrap
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from tqdm import tqdm
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+
+from xml_parser import IN_XML, OUT_JSON as PARSED_JSON, iter_drugs
+from text_processing import OUT_JSON as NLP_JSON, annotate, batch_size, load_ner
+from triples_generator import OUT_CSV, drug_triples, write_triples
+
+QUEUE_SIZE = 512   # records buffered between two stages
+
+_DONE = object()
+
+
+# ------------------------------------------------------------------ helpers
+def prefetch(items: Iterable, maxsize: int = QUEUE_SIZE) -> Iterator:
+    """Drain *items* on a background thread into a bounded queue and yield them.
+
+    Exceptions raised by the producer are re-raised in the consumer."""
+    q: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            with metrics.profile_thread():   # --profile: include this thread
+                for item in items:
+                    if stop.is_set():
+                        return
+                    q.put(item)
+        except BaseException as e:   # hand over to the consumer thread
+            q.put(e)
+        finally:
+            q.put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+    try:
+        while (item := q.get()) is not _DONE:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+class JsonArrayWriter:
+    """Write records one by one as a JSON array, byte-identical to
+    `json.dump(records, f, indent=2)` but without holding them all in memory."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.f = open(path, "w", encoding="utf-8")
+        self.n = 0
+
+    def write(self, rec: Dict) -> None:
+        self.f.write("[\n" if self.n == 0 else ",\n")
+        self.f.write(textwrap.indent(json.dumps(rec, indent=2), "  "))
+        self.n += 1
+
+    def close(self) -> None:
+        self.f.write("\n]" if self.n else "[]")
+        self.f.close()
+
+
+def tee(items: Iterable[Dict], writer: Optional[JsonArrayWriter]) -> Iterator[Dict]:
+    for rec in items:
+        if writer is not None:
+            writer.write(rec)
+        yield rec
+
+
+# ------------------------------------------------------------------ main
+def run(xml_path: str = IN_XML,
+        out_csv: Path = OUT_CSV,
+        parsed_json: Optional[Path] = None,
+        nlp_json: Optional[Path] = None,
+        queue_size: int = QUEUE_SIZE) -> int:
+    """Run the fused pipeline and return the number of triples written."""
+    with metrics.stage("load_model"):
+        ner = load_ner()
+    parsed_w = JsonArrayWriter(parsed_json) if parsed_json else None
+    nlp_w = JsonArrayWriter(nlp_json) if nlp_json else None
+
+    triples = set()
+    n_drugs = 0
+    try:
+        with metrics.stage("fused") as st:
+            parsed = tee(prefetch(iter_drugs(xml_path), queue_size), parsed_w)
+            annotated = prefetch(annotate(parsed, ner, batch_size()), queue_size)
+            for d in tqdm(tee(annotated, nlp_w), desc="Fused parse → NER → triples"):
+                drug_triples(d, triples)
+                st.add()
+            n_drugs = st.records
+    finally:
+        for w in (parsed_w, nlp_w):
+            if w is not None:
+                w.close()
+
+    with metrics.stage("write_csv") as st:
+        n = write_triples(triples, out_csv)
+        st.add(n)
+    print(f"[✓] {n_drugs:,} drugs → {n:,} triples → {out_csv}")
+    for label, path in (("parsed", parsed_json), ("annotated", nlp_json)):
+        if path:
+            print(f"[✓] Wrote {label} records → {path}")
+    return n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Parse → NER → triples in a single process.")
+    ap.add_argument("--xml", default=IN_XML, help=f"DrugBank XML dump (default: {IN_XML})")
+    ap.add_argument("--out", type=Path, default=OUT_CSV, help=f"triples CSV (default: {OUT_CSV})")
+    ap.add_argument("--write-parsed", nargs="?", type=Path, const=Path(PARSED_JSON), default=None,
+                    metavar="PATH", help=f"also write parsed records (default path: {PARSED_JSON})")
+    ap.add_argument("--write-nlp", nargs="?", type=Path, const=NLP_JSON, default=None,
+                    metavar="PATH", help=f"also write NER-annotated records (default path: {NLP_JSON})")
+    ap.add_argument("--queue", type=int, default=QUEUE_SIZE,
+                    help=f"records buffered between stages (default: {QUEUE_SIZE})")
+    metrics.add_cli_args(ap)
+    args = ap.parse_args()
+    metrics.configure_from_args("fused_pipeline", args)
+
+    if not os.path.exists(args.xml):
+        sys.exit(f"[ERROR] XML file not found: {args.xml}")
+
+    run(args.xml, args.out, args.write_parsed, args.write_nlp, args.queue)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Columnar export: parsed drug records → Parquet tables
+─────────────────────────────────────────────────────
+• Normalises each record of xml_parser.parse_drug into seven tables keyed by
+  `drug_id`: drugs, products, patents, prices, interactions, external_ids and
+  properties (calculated + experimental).
+• Rows are buffered per table and written as a Parquet row group every
+  `row_group_rows` rows (`drug_row_group_rows` for `drugs`, whose rows carry
+  all the long text fields), so memory stays flat however large the dump is.
+• Low-cardinality columns (country, route, labeller, unit …) are stored
+  dictionary-encoded; dates, masses, costs and flags get real types.
+
+    python preprocessing/xml_parser.py --parquet              # data/processed/parquet/
+    duckdb -c "SELECT country, count(*) FROM 'data/processed/parquet/products.parquet' GROUP BY 1"
+"""
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except ImportError as exc:
+    print("[!] pyarrow is required for the Parquet export – install with `pip install pyarrow`.")
+    raise exc
+
+OUT_DIR = "data/processed/parquet"
+ROW_GROUP_ROWS = 64_000
+DRUG_ROW_GROUP_ROWS = 2_000   # ~10–20 kB of text per drug → a few tens of MB buffered
+
+_S, _F, _D, _B = pa.string(), pa.float64(), pa.date32(), pa.bool_()
+_L = pa.list_(pa.string())
+_CAT = pa.dictionary(pa.int32(), pa.string())   # dictionary-encoded string
+
+# table → [(column, arrow type)]
+TABLES: Dict[str, List[tuple]] = {
+    "drugs": [
+        ("drug_id", _S), ("name", _S), ("unii", _S), ("cas_number", _S),
+        ("state", _CAT), ("average_mass", _F), ("monoisotopic_mass", _F),
+        ("kingdom", _CAT), ("superclass", _CAT), ("class", _CAT), ("subclass", _CAT),
+        ("groups", _L), ("atc_codes", _L), ("mesh_categories", _L), ("synonyms", _L),
+        ("secondary_ids", _L), ("targets", _L), ("enzymes", _L), ("carriers", _L),
+        ("transporters", _L), ("pathways", _L), ("food_interactions", _L),
+        ("description", _S), ("indication", _S), ("pharmacodynamics", _S),
+        ("mechanism_of_action", _S), ("absorption", _S), ("metabolism", _S),
+        ("half_life", _S), ("protein_binding", _S), ("clearance", _S),
+        ("volume_of_distribution", _S), ("route_of_elimination", _S),
+    ],
+    "products": [
+        ("drug_id", _S), ("name", _S), ("labeller", _CAT), ("dosage_form", _CAT),
+        ("route", _CAT), ("started", _D), ("ended", _D), ("country", _CAT), ("approved", _B),
+    ],
+    "patents": [("drug_id", _S), ("number", _S), ("country", _CAT), ("expires", _D)],
+    "prices": [("drug_id", _S), ("description", _S), ("cost", _F), ("unit", _CAT)],
+    "interactions": [("drug_id", _S), ("other_id", _S), ("other_name", _S), ("description", _S)],
+    "external_ids": [("drug_id", _S), ("resource", _CAT), ("identifier", _S)],
+    "properties": [
+        ("drug_id", _S), ("origin", _CAT), ("kind", _CAT), ("value", _S), ("source", _CAT),
+    ],
+}
+
+
+# ------------------------------------------------------------------ value casts
+def _float(s: Optional[str]) -> Optional[float]:
+    try:
+        return float(s) if s else None
+    except ValueError:
+        return None
+
+
+def _date(s: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(s) if s else None
+    except ValueError:
+        return None
+
+
+def _bool(s: Optional[str]) -> Optional[bool]:
+    return None if s is None else s.strip().lower() == "true"
+
+
+# ------------------------------------------------------------------ writer
+class ParquetSink:
+    """Accepts parsed drug records one at a time and writes the Parquet tables."""
+
+    def __init__(self, out_dir=OUT_DIR, row_group_rows: int = ROW_GROUP_ROWS,
+                 drug_row_group_rows: int = DRUG_ROW_GROUP_ROWS,
+                 compression: str = "zstd"):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.row_group_rows = {t: row_group_rows for t in TABLES}
+        self.row_group_rows["drugs"] = drug_row_group_rows
+        self.compression = compression
+        self.schemas = {t: pa.schema(cols) for t, cols in TABLES.items()}
+        self.rows = {t: 0 for t in TABLES}
+        self._buf = {t: {c: [] for c, _ in cols} for t, cols in TABLES.items()}
+        self._writers: Dict[str, "pq.ParquetWriter"] = {}
+
+    def _append(self, table: str, **row) -> None:
+        for col, values in self._buf[table].items():
+            values.append(row[col])
+
+    def add(self, rec: Dict) -> None:
+        did = rec.get("primary_id")
+        cf = rec.get("classyfire") or {}
+        self._append(
+            "drugs", drug_id=did,
+            average_mass=_float(rec.get("average_mass")),
+            monoisotopic_mass=_float(rec.get("monoisotopic_mass")),
+            kingdom=cf.get("kingdom"), superclass=cf.get("superclass"),
+            subclass=cf.get("subclass"), **{"class": cf.get("class")},
+            **{c: rec.get(c) for c in (
+                "name", "unii", "cas_number", "state", "groups", "atc_codes", "mesh_categories",
+                "synonyms", "secondary_ids", "targets", "enzymes", "carriers", "transporters",
+                "pathways", "food_interactions", "description", "indication", "pharmacodynamics",
+                "mechanism_of_action", "absorption", "metabolism", "half_life", "protein_binding",
+                "clearance", "volume_of_distribution", "route_of_elimination")},
+        )
+        for p in rec.get("products", []):
+            self._append("products", drug_id=did, name=p["name"], labeller=p["labeller"],
+                         dosage_form=p["dosage_form"], route=p["route"],
+                         started=_date(p["started"]), ended=_date(p["ended"]),
+                         country=p["country"], approved=_bool(p["approved"]))
+        for p in rec.get("patents", []):
+            self._append("patents", drug_id=did, number=p["number"], country=p["country"],
+                         expires=_date(p["expires"]))
+        for p in rec.get("prices", []):
+            self._append("prices", drug_id=did, description=p["description"],
+                         cost=_float(p["cost"]), unit=p["unit"])
+        for x in rec.get("drug_interactions", []):
+            self._append("interactions", drug_id=did, other_id=x["drugbank_id"],
+                         other_name=x["name"], description=x["description"])
+        for x in rec.get("external_identifiers", []):
+            self._append("external_ids", drug_id=did, resource=x["resource"],
+                         identifier=x["identifier"])
+        for origin in ("calculated", "experimental"):
+            for x in rec.get(f"{origin}_properties", []):
+                self._append("properties", drug_id=did, origin=origin, kind=x["kind"],
+                             value=x["value"], source=x.get("source"))
+
+        for table, cols in self._buf.items():
+            if len(cols["drug_id"]) >= self.row_group_rows[table]:
+                self._flush(table)
+
+    def _writer(self, table: str) -> "pq.ParquetWriter":
+        if table not in self._writers:
+            schema = self.schemas[table]
+            self._writers[table] = pq.ParquetWriter(
+                self.out_dir / f"{table}.parquet", schema, compression=self.compression,
+                use_dictionary=[f.name for f in schema if pa.types.is_dictionary(f.type)])
+        return self._writers[table]
+
+    def _flush(self, table: str) -> None:
+        cols = self._buf[table]
+        n = len(cols["drug_id"])
+        if not n:
+            return
+        arrays = []
+        for field in self.schemas[table]:
+            if pa.types.is_dictionary(field.type):
+                arr = pa.array(cols[field.name], pa.string()).dictionary_encode()
+            else:
+                arr = pa.array(cols[field.name], field.type)
+            arrays.append(arr)
+        batch = pa.Table.from_arrays(arrays, schema=self.schemas[table])
+        self._writer(table).write_table(batch, row_group_size=n)
+        self.rows[table] += n
+        for values in cols.values():
+            values.clear()
+
+    def close(self) -> None:
+        """Flush the last row groups; tables that stayed empty still get a file."""
+        for table in TABLES:
+            self._flush(table)
+            self._writer(table).close()
+        self._writers.clear()
+
+    def __enter__(self) -> "ParquetSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
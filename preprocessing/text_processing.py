@@ -1,8 +1,12 @@
-import json, math, os, sys, torch
+import json, os, sys, time, torch
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
 from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+
 IN_JSON  = Path("data/processed/parsed_drugs.json")
 OUT_JSON = Path("data/processed/nlp_processed.json")
 
@@ -38,52 +42,84 @@ def load_pipeline(model_id: str):
         device=get_device(),
     )
 
-def main() -> None:
-    if not IN_JSON.exists():
-        sys.exit(f"[ERROR] {IN_JSON} not found. Run xml_parser.py first.")
-
-    drugs = json.loads(IN_JSON.read_text())
-    print(f"[INFO] Loaded {len(drugs):,} drug records")
-
-    # --------------------------------------------------- load model with fallback
+def load_ner():
+    """BioBERT NER pipeline, falling back to a generic public model."""
     try:
-        ner = load_pipeline(PRIMARY_MODEL)
+        return load_pipeline(PRIMARY_MODEL)
     except Exception as e:
         print(f"[WARN] Primary model unavailable → {e}")
         print(f"[INFO] Falling back to {FALLBACK_MODEL}")
-        ner = load_pipeline(FALLBACK_MODEL)
+        return load_pipeline(FALLBACK_MODEL)
+
+def batch_size() -> int:
+    return 64 if get_device() == -1 else 256
+
+def drug_text(d: Dict) -> str:
+    return "  ".join(d.get(f, "") or "" for f in TEXT_FIELDS).strip()
+
+def annotate(drugs: Iterable[Dict], ner, batch: int) -> Iterator[Dict]:
+    """Stream *drugs* through NER, `batch` texts per call, yielding records in order
+    with `entities` set to a sorted list of (word, entity_group) pairs."""
+    pending: List[Dict] = []   # records waiting for the current batch
+    texts: List[str] = []
+    owners: List[Dict] = []
+
+    def flush() -> Iterator[Dict]:
+        if texts:
+            t0 = time.perf_counter()
+            outputs = ner(texts)
+            metrics.observe("ner_batch", time.perf_counter() - t0)
+            for d, ents in zip(owners, outputs):
+                uniq = {(e["word"].strip(), e["entity_group"]) for e in ents}
+                d["entities"] = sorted(uniq)
+        yield from pending
+        for buf in (pending, texts, owners):
+            buf.clear()
 
-    # --------------------------------------------------- gather texts
-    texts, idx_map = [], []
-    for i, d in enumerate(tqdm(drugs, desc="Collect texts")):
-        combined = "  ".join(d.get(f, "") or "" for f in TEXT_FIELDS).strip()
+    for d in drugs:
+        combined = drug_text(d)
         if combined:
             texts.append(truncated(combined))
-            idx_map.append(i)
+            owners.append(d)
         else:
             d["entities"] = []
+        pending.append(d)
+        if len(texts) >= batch:
+            yield from flush()
+    yield from flush()
 
-    if not texts:
+def main() -> None:
+    if not IN_JSON.exists():
+        sys.exit(f"[ERROR] {IN_JSON} not found. Run xml_parser.py first.")
+
+    with metrics.stage("load_json") as st:
+        drugs = json.loads(IN_JSON.read_text())
+        st.add(len(drugs))
+    print(f"[INFO] Loaded {len(drugs):,} drug records")
+
+    # --------------------------------------------------- load model with fallback
+    with metrics.stage("load_model"):
+        ner = load_ner()
+
+    if not any(drug_text(d) for d in drugs):
+        for d in drugs:
+            d["entities"] = []
         print("[WARN] No descriptions found → nothing to annotate.")
         OUT_JSON.write_text(json.dumps(drugs, indent=2))
         return
 
     # --------------------------------------------------- batched inference
-    BATCH = 64 if get_device() == -1 else 256
-    batches = math.ceil(len(texts) / BATCH)
-
-    for b in tqdm(range(batches), desc="NER inference"):
-        batch_texts = texts[b * BATCH : (b + 1) * BATCH]
-        outputs = ner(batch_texts)
-        for j, ents in enumerate(outputs):
-            gidx = idx_map[b * BATCH + j]
-            uniq = {(e["word"].strip(), e["entity_group"]) for e in ents}
-            drugs[gidx]["entities"] = sorted(uniq)
+    with metrics.stage("ner") as st:
+        drugs = list(annotate(tqdm(drugs, desc="NER inference"), ner, batch_size()))
+        st.add(len(drugs))
 
     # --------------------------------------------------- save
-    OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
-    OUT_JSON.write_text(json.dumps(drugs, indent=2))
+    with metrics.stage("write_json") as st:
+        OUT_JSON.parent.mkdir(parents=True, exist_ok=True)
+        OUT_JSON.write_text(json.dumps(drugs, indent=2))
+        st.add(len(drugs))
     print(f"[✓] Annotated {len(drugs):,} drugs → {OUT_JSON}")
 
 if __name__ == "__main__":
+    metrics.init_cli("text_processing", "BioBERT NER over parsed_drugs.json → nlp_processed.json")
     main()
\ No newline at end of file
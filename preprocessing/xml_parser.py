@@ -1,10 +1,15 @@
-import json, os, sys
+import argparse, contextlib, json, os, sys
+from pathlib import Path
 from lxml import etree
 from tqdm import tqdm
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
 
 IN_XML   = "data/raw/full_database.xml"
 OUT_JSON = "data/processed/parsed_drugs.json"
+OUT_PARQUET = "data/processed/parquet"
 
 
 # ------------------------------------------------------------------ helpers
@@ -24,163 +29,196 @@ def attr_texts(e: etree._Element, path: str, attr: str) -> List[str]:
     return [x.get(attr).strip() for x in e.findall(path) if x.get(attr)]
 
 
+# ------------------------------------------------------------------ record
+def parse_drug(d: etree._Element) -> Dict:
+    """Flatten one <drug> element into the record stored in parsed_drugs.json."""
+    # ---------- identifiers (direct children only – interaction partners,
+    # metabolites etc. carry <drugbank-id> elements of their own)
+    primary_id = text(d, "./{*}drugbank-id[@primary='true']")
+    if not primary_id:  # fallback to first id if none flagged primary
+        primary_id = text(d, "./{*}drugbank-id")
+    secondary_ids = [
+        x.text.strip() for x in d.findall("./{*}drugbank-id")
+        if (x.text and x.get("primary") != "true")
+    ]
+
+    # ---------- build record
+    rec = {
+        "primary_id":    primary_id,
+        "secondary_ids": secondary_ids,
+        "unii":          text(d, ".//{*}unii"),
+        "cas_number":    text(d, ".//{*}cas-number"),
+
+        # basic info
+        "name":          text(d, ".//{*}name"),
+        "description":   text(d, ".//{*}description"),
+        "indication":    text(d, ".//{*}indication"),
+        "pharmacodynamics": text(d, ".//{*}pharmacodynamics"),
+        "mechanism_of_action": text(d, ".//{*}mechanism-of-action"),
+
+        # physical / chemical
+        "average_mass":       text(d, ".//{*}average-mass"),
+        "monoisotopic_mass":  text(d, ".//{*}monoisotopic-mass"),
+        "state":              text(d, ".//{*}state"),
+        "calculated_properties": [
+            {
+                "kind":  x.get("kind"),
+                "value": text(x, ".//{*}value"),
+            }
+            for x in d.findall(".//{*}calculated-properties/{*}property")
+        ],
+        "experimental_properties": [
+            {
+                "kind":  x.get("kind"),
+                "value": text(x, ".//{*}value"),
+                "source":text(x, ".//{*}source"),
+            }
+            for x in d.findall(".//{*}experimental-properties/{*}property")
+        ],
+
+        # pharmacokinetics
+        "absorption":          text(d, ".//{*}absorption"),
+        "metabolism":          text(d, ".//{*}metabolism"),
+        "half_life":           text(d, ".//{*}half-life"),
+        "protein_binding":     text(d, ".//{*}protein-binding"),
+        "clearance":           text(d, ".//{*}clearance"),
+        "volume_of_distribution": text(d, ".//{*}volume-of-distribution"),
+        "route_of_elimination":   text(d, ".//{*}route-of-elimination"),
+
+        # classification & grouping
+        "groups":          texts(d, ".//{*}groups/{*}group"),
+        "classyfire": {
+            "kingdom":    text(d, ".//{*}classification/{*}kingdom"),
+            "superclass": text(d, ".//{*}classification/{*}superclass"),
+            "class":      text(d, ".//{*}classification/{*}class"),
+            "subclass":   text(d, ".//{*}classification/{*}subclass"),
+        },
+        "atc_codes":      attr_texts(d, ".//{*}atc-codes/{*}atc-code", "code"),
+        "mesh_categories": texts(d, ".//{*}categories/{*}category/{*}category"),
+
+        # interactions
+        "drug_interactions": [
+            {
+                "drugbank_id": text(x, ".//{*}drugbank-id"),
+                "name":        text(x, ".//{*}name"),
+                "description": text(x, ".//{*}description"),
+            }
+            for x in d.findall(".//{*}drug-interaction")
+        ],
+        "food_interactions": texts(d, ".//{*}food-interaction"),
+
+        # commercial / regulatory
+        "products": [
+            {
+                "name":       text(p, ".//{*}name"),
+                "labeller":   text(p, ".//{*}labeller"),
+                "dosage_form":text(p, ".//{*}dosage-form"),
+                "route":      text(p, ".//{*}route"),
+                "started":    text(p, ".//{*}started-marketing-on"),
+                "ended":      text(p, ".//{*}ended-marketing-on"),
+                "country":    text(p, ".//{*}country"),
+                "approved":   text(p, ".//{*}approved"),
+            }
+            for p in d.findall(".//{*}products/{*}product")
+        ],
+        "patents": [
+            {
+                "number":   text(p, ".//{*}number"),
+                "country":  text(p, ".//{*}country"),
+                "expires":  text(p, ".//{*}expires"),
+            }
+            for p in d.findall(".//{*}patents/{*}patent")
+        ],
+        "prices": [
+            {
+                "description": text(p, ".//{*}description"),
+                "cost":        text(p, ".//{*}cost"),
+                "unit":        text(p, ".//{*}unit"),
+            }
+            for p in d.findall(".//{*}prices/{*}price")
+        ],
+
+        # biological interactions (IDs only for brevity)
+        "targets":      attr_texts(d, ".//{*}targets/{*}target", "id"),
+        "enzymes":      attr_texts(d, ".//{*}enzymes/{*}enzyme", "id"),
+        "carriers":     attr_texts(d, ".//{*}carriers/{*}carrier", "id"),
+        "transporters": attr_texts(d, ".//{*}transporters/{*}transporter", "id"),
+
+        # pathways & reactions (just IDs / names)
+        "pathways": [
+            text(p, ".//{*}name") for p in d.findall(".//{*}pathways/{*}pathway")
+        ],
+        "reactions": attr_texts(d, ".//{*}reactions/{*}reaction", "id"),
+
+        # SNPs (ids only)
+        "snp_effects": attr_texts(d, ".//{*}snp-effects/{*}snp-effect", "rs-id"),
+        "snp_adrs":    attr_texts(d, ".//{*}snp-adverse-drug-reactions/{*}snp-adverse-drug-reaction", "rs-id"),
+
+        # references & external
+        "external_identifiers": [
+            {
+                "resource":  text(x, ".//{*}resource"),
+                "identifier":text(x, ".//{*}identifier"),
+            }
+            for x in d.findall(".//{*}external-identifiers/{*}external-identifier")
+        ],
+        "external_links": [
+            {
+                "resource": x.get("resource"),
+                "url":      x.text.strip() if x.text else None
+            }
+            for x in d.findall(".//{*}external-links/{*}external-link")
+        ],
+        "synonyms": texts(d, ".//{*}synonyms/{*}synonym"),
+    }
+
+    return rec
+
+
+def iter_drugs(path: str = IN_XML) -> Iterator[Dict]:
+    """Stream parsed drug records out of *path* one <drug> at a time."""
+    context = etree.iterparse(path, events=("end",), tag="{*}drug")
+    for _ev, d in context:
+        yield parse_drug(d)
+        d.clear()   # free memory
+
+
 # ------------------------------------------------------------------ main
-def parse() -> None:
+def parse(parquet_dir: Optional[str] = None) -> None:
     if not os.path.exists(IN_XML):
         sys.exit(f"[ERROR] XML file not found: {IN_XML}")
 
-    context = etree.iterparse(IN_XML, events=("end",), tag="{*}drug")
-    records: List[Dict] = []
-
-    for _ev, d in tqdm(context, desc="Parsing <drug>"):
-        # ---------- identifiers
-        primary_id = text(d, ".//{*}drugbank-id[@primary='true']")
-        if not primary_id:  # fallback to first id if none flagged primary
-            primary_id = text(d, ".//{*}drugbank-id")
-        secondary_ids = [
-            x.text.strip() for x in d.findall(".//{*}drugbank-id")
-            if (x.text and x.get("primary") != "true")
-        ]
-
-        # ---------- build record
-        rec = {
-            "primary_id":    primary_id,
-            "secondary_ids": secondary_ids,
-            "unii":          text(d, ".//{*}unii"),
-            "cas_number":    text(d, ".//{*}cas-number"),
-
-            # basic info
-            "name":          text(d, ".//{*}name"),
-            "description":   text(d, ".//{*}description"),
-            "indication":    text(d, ".//{*}indication"),
-            "pharmacodynamics": text(d, ".//{*}pharmacodynamics"),
-            "mechanism_of_action": text(d, ".//{*}mechanism-of-action"),
-
-            # physical / chemical
-            "average_mass":       text(d, ".//{*}average-mass"),
-            "monoisotopic_mass":  text(d, ".//{*}monoisotopic-mass"),
-            "state":              text(d, ".//{*}state"),
-            "calculated_properties": [
-                {
-                    "kind":  x.get("kind"),
-                    "value": text(x, ".//{*}value"),
-                }
-                for x in d.findall(".//{*}calculated-properties/{*}property")
-            ],
-            "experimental_properties": [
-                {
-                    "kind":  x.get("kind"),
-                    "value": text(x, ".//{*}value"),
-                    "source":text(x, ".//{*}source"),
-                }
-                for x in d.findall(".//{*}experimental-properties/{*}property")
-            ],
-
-            # pharmacokinetics
-            "absorption":          text(d, ".//{*}absorption"),
-            "metabolism":          text(d, ".//{*}metabolism"),
-            "half_life":           text(d, ".//{*}half-life"),
-            "protein_binding":     text(d, ".//{*}protein-binding"),
-            "clearance":           text(d, ".//{*}clearance"),
-            "volume_of_distribution": text(d, ".//{*}volume-of-distribution"),
-            "route_of_elimination":   text(d, ".//{*}route-of-elimination"),
-
-            # classification & grouping
-            "groups":          texts(d, ".//{*}groups/{*}group"),
-            "classyfire": {
-                "kingdom":    text(d, ".//{*}classification/{*}kingdom"),
-                "superclass": text(d, ".//{*}classification/{*}superclass"),
-                "class":      text(d, ".//{*}classification/{*}class"),
-                "subclass":   text(d, ".//{*}classification/{*}subclass"),
-            },
-            "atc_codes":      attr_texts(d, ".//{*}atc-codes/{*}atc-code", "code"),
-            "mesh_categories": texts(d, ".//{*}categories/{*}category/{*}category"),
-
-            # interactions
-            "drug_interactions": [
-                {
-                    "drugbank_id": text(x, ".//{*}drugbank-id"),
-                    "name":        text(x, ".//{*}name"),
-                    "description": text(x, ".//{*}description"),
-                }
-                for x in d.findall(".//{*}drug-interaction")
-            ],
-            "food_interactions": texts(d, ".//{*}food-interaction"),
-
-            # commercial / regulatory
-            "products": [
-                {
-                    "name":       text(p, ".//{*}name"),
-                    "labeller":   text(p, ".//{*}labeller"),
-                    "dosage_form":text(p, ".//{*}dosage-form"),
-                    "route":      text(p, ".//{*}route"),
-                    "started":    text(p, ".//{*}started-marketing-on"),
-                    "ended":      text(p, ".//{*}ended-marketing-on"),
-                    "country":    text(p, ".//{*}country"),
-                    "approved":   text(p, ".//{*}approved"),
-                }
-                for p in d.findall(".//{*}products/{*}product")
-            ],
-            "patents": [
-                {
-                    "number":   text(p, ".//{*}number"),
-                    "country":  text(p, ".//{*}country"),
-                    "expires":  text(p, ".//{*}expires"),
-                }
-                for p in d.findall(".//{*}patents/{*}patent")
-            ],
-            "prices": [
-                {
-                    "description": text(p, ".//{*}description"),
-                    "cost":        text(p, ".//{*}cost"),
-                    "unit":        text(p, ".//{*}unit"),
-                }
-                for p in d.findall(".//{*}prices/{*}price")
-            ],
-
-            # biological interactions (IDs only for brevity)
-            "targets":      attr_texts(d, ".//{*}targets/{*}target", "id"),
-            "enzymes":      attr_texts(d, ".//{*}enzymes/{*}enzyme", "id"),
-            "carriers":     attr_texts(d, ".//{*}carriers/{*}carrier", "id"),
-            "transporters": attr_texts(d, ".//{*}transporters/{*}transporter", "id"),
-
-            # pathways & reactions (just IDs / names)
-            "pathways": [
-                text(p, ".//{*}name") for p in d.findall(".//{*}pathways/{*}pathway")
-            ],
-            "reactions": attr_texts(d, ".//{*}reactions/{*}reaction", "id"),
-
-            # SNPs (ids only)
-            "snp_effects": attr_texts(d, ".//{*}snp-effects/{*}snp-effect", "rs-id"),
-            "snp_adrs":    attr_texts(d, ".//{*}snp-adverse-drug-reactions/{*}snp-adverse-drug-reaction", "rs-id"),
-
-            # references & external
-            "external_identifiers": [
-                {
-                    "resource":  text(x, ".//{*}resource"),
-                    "identifier":text(x, ".//{*}identifier"),
-                }
-                for x in d.findall(".//{*}external-identifiers/{*}external-identifier")
-            ],
-            "external_links": [
-                {
-                    "resource": x.get("resource"),
-                    "url":      x.text.strip() if x.text else None
-                }
-                for x in d.findall(".//{*}external-links/{*}external-link")
-            ],
-            "synonyms": texts(d, ".//{*}synonyms/{*}synonym"),
-        }
-
-        records.append(rec)
-        d.clear()   # free memory
-
-    os.makedirs(os.path.dirname(OUT_JSON), exist_ok=True)
-    with open(OUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(records, f, indent=2)
+    sink = None
+    if parquet_dir:
+        from parquet_export import ParquetSink   # needs pyarrow
+        sink = ParquetSink(parquet_dir)
+
+    # the sink is closed even if parsing fails, so no footer-less files are left
+    with metrics.stage("parse") as st, (sink or contextlib.nullcontext()):
+        records: List[Dict] = []
+        for rec in tqdm(iter_drugs(IN_XML), desc="Parsing <drug>"):
+            records.append(rec)
+            if sink:
+                sink.add(rec)   # row groups are flushed as they fill up
+        st.add(len(records))
+
+    with metrics.stage("write_json") as st:
+        os.makedirs(os.path.dirname(OUT_JSON), exist_ok=True)
+        with open(OUT_JSON, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+        st.add(len(records))
 
     print(f"[✓] Parsed {len(records):,} drug records → {OUT_JSON}")
+    if sink:
+        counts = ", ".join(f"{t} {n:,}" for t, n in sink.rows.items())
+        print(f"[✓] Parquet tables → {parquet_dir} ({counts} rows)")
 
 
 if __name__ == "__main__":
-    parse()
\ No newline at end of file
+    ap = argparse.ArgumentParser(description="Parse DrugBank XML → parsed_drugs.json")
+    ap.add_argument("--parquet", nargs="?", const=OUT_PARQUET, default=None, metavar="DIR",
+                    help=f"also write normalised Parquet tables (default dir: {OUT_PARQUET})")
+    metrics.add_cli_args(ap)
+    args = ap.parse_args()
+    metrics.configure_from_args("xml_parser", args)
+    parse(parquet_dir=args.parquet)
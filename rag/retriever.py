@@ -8,6 +8,8 @@ Light-weight embedding retriever
 
 import argparse
 import json
+import sys
+import time
 from pathlib import Path
 from typing import List
 
@@ -16,14 +18,27 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 from langchain.schema import Document
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))   # project root → `common`
+from common import metrics
+from common.name_resolver import load_resolver
+
 # ───────── configuration ─────────
 EMBED_DIR   = Path(__file__).resolve().parent.parent / "embeddings"
 MODEL_NAME  = "sentence-transformers/all-MiniLM-L6-v2"
 DEVICE      = "cpu"            # change to "cuda" if you have a GPU
 
 # ───────── helpers ───────────────
+_RESOURCES = None   # loaded once per process
+
+
 def load_resources():
-    """Returns (encoder, faiss_index, doc_texts, doc_ids)"""
+    """Returns (encoder, faiss_index, doc_texts, doc_ids), cached after the first call."""
+    global _RESOURCES
+    if _RESOURCES is not None:
+        metrics.cache_hit("retriever_resources")
+        return _RESOURCES
+    metrics.cache_miss("retriever_resources")
+
     # texts
     docs_path = EMBED_DIR / "docs.json"
     ids_path  = EMBED_DIR / "ids.json"
@@ -39,15 +54,23 @@ def load_resources():
     index = faiss.read_index(str(index_path))
 
     encoder = SentenceTransformer(MODEL_NAME, device=DEVICE)
-    return encoder, index, texts, ids
+    _RESOURCES = encoder, index, texts, ids
+    return _RESOURCES
 
 
 def retrieve(query: str, k: int = 5) -> List[Document]:
     """Return top-k Documents for the query."""
     encoder, index, texts, ids = load_resources()
+    resolver = load_resolver()
+    if resolver is not None:   # "Coumadin dose" → "Coumadin (Warfarin) dose"
+        query = resolver.annotate_text(query)
 
+    t0 = time.perf_counter()
     q_emb = encoder.encode([query], normalize_embeddings=True).astype("float32")
+    t1 = time.perf_counter()
     scores, idxs = index.search(q_emb, k)          # (1, k)
+    metrics.observe("encode_query", t1 - t0)
+    metrics.observe("faiss_search", time.perf_counter() - t1)
 
     docs: List[Document] = []
     for rank, (score, idx) in enumerate(zip(scores[0], idxs[0]), start=1):
@@ -65,8 +88,12 @@ if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--query", required=True, help="Natural-language query")
     ap.add_argument("--topk",  type=int, default=5, help="Number of results")
+    metrics.add_cli_args(ap)
     args = ap.parse_args()
+    metrics.configure_from_args("retriever", args)
 
-    for doc in retrieve(args.query, args.topk):
+    with metrics.stage("retrieve"):
+        docs = retrieve(args.query, args.topk)
+    for doc in docs:
         print(f"\n— rank {doc.metadata['rank']}  score={doc.metadata['score']:.4f}")
         print(doc.page_content[:400], "...")